@@ -0,0 +1,196 @@
+"""Plan many trips from a JSONL file with a bounded pool of trip crews.
+
+Each input line describes one trip:
+
+  {"id": "lis-may", "origin": "London", "cities": "Lisbon, Porto",
+   "date_range": "May 2025", "interests": "food, surfing"}
+
+Finished plans are appended to the output JSONL as soon as they complete.
+The output doubles as the checkpoint: rerunning the same command skips
+every item already planned successfully, so a crashed run resumes where it
+stopped. Lines that cannot be planned (invalid JSON, missing fields) get an
+error record and the batch goes on; repeated ids are planned once. All crews
+run in one process and share the search, scrape and summary caches.
+
+  python batch.py trips.jsonl plans.jsonl --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from main import TripCrew
+from tools.cache import content_hash
+
+FIELDS = ("origin", "cities", "date_range", "interests")
+
+
+def item_id(item):
+  """Use the item's own id, or derive a stable one from its trip fields."""
+  if item.get("id") is not None:
+    return str(item["id"])
+  return content_hash(*(str(item.get(field, "")) for field in FIELDS))[:16]
+
+
+def read_requests(path):
+  """Yield (item, error) per non-empty line; error describes a line that cannot be planned."""
+  with open(path) as f:
+    for line_number, line in enumerate(f, 1):
+      line = line.strip()
+      if not line:
+        continue
+      try:
+        item = json.loads(line)
+      except json.JSONDecodeError as e:
+        yield {"id": f"line-{line_number}"}, f"{path}:{line_number} is not valid JSON: {e}"
+        continue
+      if not isinstance(item, dict):
+        yield {"id": f"line-{line_number}"}, f"{path}:{line_number} is not a JSON object"
+        continue
+      missing = [field for field in FIELDS if field not in item]
+      if missing:
+        if item.get("id") is None:
+          item = {**item, "id": f"line-{line_number}"}
+        yield item, f"{path}:{line_number} is missing {', '.join(missing)}"
+        continue
+      yield item, None
+
+
+def completed_ids(path):
+  """Ids a previous run finished: planned successfully, or rejected as invalid input."""
+  done = set()
+  if not os.path.exists(path):
+    return done
+  with open(path) as f:
+    for line in f:
+      try:
+        record = json.loads(line)
+      except json.JSONDecodeError:
+        # A crash can leave a truncated last line behind
+        continue
+      if record.get("status") == "ok" or record.get("input_error"):
+        done.add(record["id"])
+  return done
+
+
+class ResultWriter():
+  """Appends one JSON record per finished item and makes it durable."""
+
+  def __init__(self, path):
+    self._file = open(path, "a")
+    self._lock = threading.Lock()
+
+  def write(self, record):
+    line = json.dumps(record) + "\n"
+    with self._lock:
+      self._file.write(line)
+      self._file.flush()
+      os.fsync(self._file.fileno())
+
+  def close(self):
+    self._file.close()
+
+
+def plan_trip(item, trace_dir=None):
+  start = time.perf_counter()
+  record = {"id": item_id(item), **{field: item[field] for field in FIELDS}}
+  try:
+    crew = TripCrew(item["origin"], item["cities"], item["date_range"], item["interests"],
+                    verbose=False, trace_dir=trace_dir)
+    record.update(status="ok", result=str(crew.run()))
+  except Exception as e:
+    record.update(status="error", error=f"{type(e).__name__}: {e}")
+  record["latency"] = round(time.perf_counter() - start, 3)
+  return record
+
+
+def percentile(values, q):
+  values = sorted(values)
+  return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def run_batch(input_path, output_path, workers=4, progress_every=10, trace_dir=None):
+  """Plan every pending trip of input_path and return throughput statistics."""
+  done = completed_ids(output_path)
+  requests = read_requests(input_path)
+  seen = set(done)
+  writer = ResultWriter(output_path)
+  latencies, failed, duplicates = [], 0, 0
+  start = time.perf_counter()
+
+  def finish(record):
+    nonlocal failed
+    writer.write(record)
+    if record["status"] == "ok":
+      latencies.append(record["latency"])
+    else:
+      failed += 1
+    total = len(latencies) + failed
+    if total % progress_every == 0:
+      elapsed = time.perf_counter() - start
+      print(f"{total} planned ({failed} failed), {total / elapsed * 3600:.1f} trips/hour")
+
+  try:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+      in_flight = set()
+      exhausted = False
+      while in_flight or not exhausted:
+        # Keep the pool busy without reading the whole input into memory
+        while not exhausted and len(in_flight) < workers * 2:
+          entry = next(requests, None)
+          if entry is None:
+            exhausted = True
+            continue
+          item, error = entry
+          trip_id = item_id(item)
+          if trip_id in seen:
+            # Planned by a previous run, or repeated earlier in this input
+            if trip_id not in done:
+              duplicates += 1
+            continue
+          seen.add(trip_id)
+          if error is not None:
+            finish({"id": trip_id, "status": "error", "error": error, "input_error": True, "latency": 0.0})
+          else:
+            in_flight.add(pool.submit(plan_trip, item, trace_dir))
+        if not in_flight:
+          continue
+        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+          finish(future.result())
+  finally:
+    writer.close()
+
+  elapsed = time.perf_counter() - start
+  stats = {
+      "skipped": len(done),
+      "duplicates": duplicates,
+      "completed": len(latencies),
+      "failed": failed,
+      "wall_time": round(elapsed, 1),
+      "trips_per_hour": round((len(latencies) + failed) / elapsed * 3600, 1) if elapsed else 0.0,
+  }
+  if latencies:
+    stats.update(
+        latency_mean=round(statistics.mean(latencies), 1),
+        latency_p50=round(percentile(latencies, 0.5), 1),
+        latency_p95=round(percentile(latencies, 0.95), 1),
+        latency_max=round(max(latencies), 1))
+  return stats
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Plan many trips from a JSONL file")
+  parser.add_argument("input", help="JSONL file with origin, cities, date_range and interests per line")
+  parser.add_argument("output", help="JSONL file the plans are appended to; also used to resume")
+  parser.add_argument("--workers", type=int, default=4, help="trip crews running at the same time")
+  parser.add_argument("--trace-dir", help="write a JSON trace of every trip to this directory")
+  args = parser.parse_args()
+
+  stats = run_batch(args.input, args.output, workers=args.workers, trace_dir=args.trace_dir)
+  print("\n## Batch summary")
+  for key, value in stats.items():
+    print(f"{key:>16}: {value}")
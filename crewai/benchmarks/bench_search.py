@@ -0,0 +1,42 @@
+"""Serial, batched and cached internet searches against a local Serper stand-in.
+
+Run from the crewai directory:
+
+    python -m benchmarks.bench_search
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.standins import SerperStandIn
+
+LATENCY = 0.3
+CITIES = ["Lisbon", "Porto", "Seville", "Valencia", "Barcelona"]
+
+
+def timed(label, standin, fn):
+  requests_before = standin.requests
+  start = time.perf_counter()
+  results = fn()
+  elapsed = time.perf_counter() - start
+  print(f"{label:<28}{standin.requests - requests_before:>10}{elapsed:>16.2f}{len(results):>10}")
+
+
+def main():
+  with SerperStandIn(latency=LATENCY) as serper, tempfile.TemporaryDirectory() as cache_dir:
+    os.environ["SERPER_URL"] = f"{serper.base_url}/search"
+    os.environ["SERPER_API_KEY"] = "standin"
+    os.environ["TRIP_CACHE_PATH"] = os.path.join(cache_dir, "cache.sqlite3")
+    from tools.search_tools import fetch_results, search_cache, search_many
+
+    queries = [f"weather in {city} in May" for city in CITIES]
+    print(f"{len(queries)} queries, {LATENCY}s per Serper request\n")
+    print(f"{'':<28}{'requests':>10}{'wall time (s)':>16}{'results':>10}")
+    timed("serial", serper, lambda: [r for q in queries for r in fetch_results(q)[:4]])
+    search_cache.clear()
+    timed("batch (concurrent)", serper, lambda: search_many(queries))
+    timed("batch (cached)", serper, lambda: search_many([q.upper() for q in queries]))
+
+
+if __name__ == "__main__":
+  main()
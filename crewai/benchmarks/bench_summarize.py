@@ -0,0 +1,43 @@
+"""Wall-clock time of serial versus parallel map-reduce page summarization.
+
+Summaries are cached; the cache lives in a temporary directory and is
+cleared before every parallelism level, so each level makes every call.
+
+Run from the crewai directory:
+
+    python -m benchmarks.bench_summarize
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.standins import OllamaStandIn
+
+LATENCY = 0.5
+CHUNKS = 12
+CHUNK_SIZE = 8000
+PARAGRAPH = "The old town has narrow streets, markets, museums and a cathedral. " * 120
+
+
+def main():
+  with OllamaStandIn(latency=LATENCY) as ollama, tempfile.TemporaryDirectory() as cache_dir:
+    os.environ["OLLAMA_BASE_URL"] = ollama.base_url
+    os.environ["TRIP_CACHE_PATH"] = os.path.join(cache_dir, "cache.sqlite3")
+    from tools.browser_tools import map_reduce_summarize
+    from tools.cache import summary_cache
+
+    content = PARAGRAPH * CHUNKS
+    chunks = [content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE)]
+    print(f"{len(chunks)} chunks, {LATENCY}s per Ollama call\n")
+    print(f"{'parallelism':>12}{'calls':>8}{'wall time (s)':>16}")
+    for parallelism in (1, 2, 4, 8):
+      summary_cache.clear()
+      calls = ollama.requests
+      start = time.perf_counter()
+      map_reduce_summarize(chunks, parallelism=parallelism)
+      elapsed = time.perf_counter() - start
+      print(f"{parallelism:>12}{ollama.requests - calls:>8}{elapsed:>16.2f}")
+
+
+if __name__ == "__main__":
+  main()
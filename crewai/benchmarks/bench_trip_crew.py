@@ -0,0 +1,162 @@
+"""Offline end-to-end benchmark of TripCrew.run.
+
+Serper, browserless and the Ollama summarizer are replaced by local HTTP
+stand-ins, HTML partitioning by an offline parser (unstructured needs NLTK
+data from the network) and the agents' LLM by `ScriptedLLM`, so no API key,
+model or download is needed. A run in which any tool call failed is an
+error rather than a result. Every scenario starts with cold caches and reports wall time, the
+LLM and tool calls of each task (from the run's trace) and peak Python
+memory, then compares them with the stored baselines in
+baselines/trip_crew.json. Peak memory is measured in a second run, so that
+tracemalloc does not slow down the timed one.
+
+Run from the crewai directory:
+
+    python -m benchmarks.bench_trip_crew                   # compare with the baselines
+    python -m benchmarks.bench_trip_crew --save-baseline   # record new baselines
+
+The exit status is 1 when a metric regressed by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.scripted_llm import ScriptedLLM
+from benchmarks.standins import BrowserlessStandIn, OllamaStandIn, SerperStandIn, partition_html
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "trip_crew.json")
+SCENARIOS = {
+    "one_city": {"origin": "London", "cities": "Lisbon", "date_range": "May 2025", "interests": "food, history"},
+    "three_cities": {"origin": "London", "cities": "Lisbon, Porto, Seville", "date_range": "May 2025",
+                     "interests": "food, history"},
+}
+# Metrics compared with the baselines; lower is better for all of them
+METRICS = ("wall_time", "llm_calls", "tool_calls", "peak_memory_mb")
+
+
+def cold_crew(trip, llm_latency, trace_dir):
+  """A crew for trip with every cache of the previous run dropped."""
+  import main
+  from tools import browser_tools
+  from tools.cache import page_cache, summary_cache
+  from tools.chunking import boilerplate_tracker
+  from tools.search_tools import search_cache
+
+  for cache in (page_cache, summary_cache, search_cache, boilerplate_tracker):
+    cache.clear()
+  browser_tools.partition_html = partition_html
+  main.llm = ScriptedLLM(latency=llm_latency)
+  return main.TripCrew(trip["origin"], trip["cities"], trip["date_range"], trip["interests"],
+                       verbose=False, trace_dir=trace_dir)
+
+
+def check_tools(crew):
+  """Raise if a tool call failed; agents retry failed tools, which skews every metric."""
+  errors = [span for span in crew.tracer.spans if span["kind"] == "tool" and "error" in span["attributes"]]
+  if errors:
+    first = errors[0]
+    raise RuntimeError(f"{len(errors)} tool call(s) failed, first {first['name']}: {first['attributes']['error']}")
+
+
+def run_scenario(trip, llm_latency, trace_dir):
+  crew = cold_crew(trip, llm_latency, trace_dir)
+  start = time.perf_counter()
+  crew.run()
+  wall_time = time.perf_counter() - start
+  check_tools(crew)
+
+  tracemalloc.start()
+  memory_crew = cold_crew(trip, llm_latency, trace_dir)
+  memory_crew.run()
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  check_tools(memory_crew)
+
+  tasks = crew.tracer.task_stats()
+  return {
+      "wall_time": round(wall_time, 3),
+      "llm_calls": sum(task["llm_calls"] for task in tasks),
+      "tool_calls": sum(task["tool_calls"] for task in tasks),
+      "peak_memory_mb": round(peak / 1024 / 1024, 1),
+      "tasks": [{key: task[key] for key in ("task", "llm_calls", "tool_calls")} for task in tasks],
+  }
+
+
+def compare(name, result, baseline, tolerance):
+  """Print the result next to its baseline and return the regressed metrics."""
+  regressions = []
+  print(f"\n## {name}")
+  print(f"{'metric':<16}{'value':>12}{'baseline':>12}{'change':>10}")
+  for metric in METRICS:
+    value = result[metric]
+    base = baseline.get(metric) if baseline else None
+    if base is None:
+      print(f"{metric:<16}{value:>12}{'-':>12}{'-':>10}")
+      continue
+    change = (value - base) / base if base else 0.0
+    regressed = value > base * (1 + tolerance)
+    if regressed:
+      regressions.append(metric)
+    print(f"{metric:<16}{value:>12}{base:>12}{change * 100:>9.1f}%" + ("  REGRESSION" if regressed else ""))
+  print(f"\n{'task':<36}{'llm calls':>10}{'tool calls':>12}")
+  for task in result["tasks"]:
+    print(f"{task['task'][:35]:<36}{task['llm_calls']:>10}{task['tool_calls']:>12}")
+  return regressions
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the trip crew")
+  parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                      help="scenario to run, can be repeated (default: all)")
+  parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per agent LLM call")
+  parser.add_argument("--summary-latency", type=float, default=0.2, help="seconds per summarizer call")
+  parser.add_argument("--search-latency", type=float, default=0.2, help="seconds per Serper request")
+  parser.add_argument("--scrape-latency", type=float, default=0.5, help="seconds per browserless request")
+  parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+  parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baselines")
+  args = parser.parse_args()
+
+  baselines = {}
+  if os.path.exists(BASELINES_PATH):
+    with open(BASELINES_PATH) as f:
+      baselines = json.load(f)
+
+  with SerperStandIn(latency=args.search_latency) as serper, \
+      BrowserlessStandIn(latency=args.scrape_latency) as browserless, \
+      OllamaStandIn(latency=args.summary_latency) as ollama, \
+      tempfile.TemporaryDirectory() as workdir:
+    os.environ.update({
+        "SERPER_URL": f"{serper.base_url}/search",
+        "SERPER_API_KEY": "standin",
+        "BROWSERLESS_URL": browserless.base_url,
+        "BROWSERLESS_API_KEY": "standin",
+        "OLLAMA_BASE_URL": ollama.base_url,
+        "TRIP_CACHE_PATH": os.path.join(workdir, "cache.sqlite3"),
+        "LLM_CACHE_MODE": "passthrough",
+        # crewai's telemetry would otherwise export spans over the network
+        "OTEL_SDK_DISABLED": "true",
+    })
+
+    results, regressions = {}, []
+    for name in args.scenario or sorted(SCENARIOS):
+      results[name] = run_scenario(SCENARIOS[name], args.llm_latency, os.path.join(workdir, "traces"))
+      regressions += [f"{name}.{metric}" for metric in
+                      compare(name, results[name], baselines.get(name), args.tolerance)]
+
+  if args.save_baseline:
+    baselines.update({name: {metric: result[metric] for metric in METRICS} for name, result in results.items()})
+    os.makedirs(os.path.dirname(BASELINES_PATH), exist_ok=True)
+    with open(BASELINES_PATH, "w") as f:
+      json.dump(baselines, f, indent=2)
+    print(f"\nBaselines written to {BASELINES_PATH}")
+  elif regressions:
+    print(f"\nRegressed: {', '.join(regressions)}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
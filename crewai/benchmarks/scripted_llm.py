@@ -0,0 +1,57 @@
+"""A deterministic stand-in for the crew's LLM.
+
+`ScriptedLLM` answers every agent prompt with valid ReAct steps: it searches
+the internet, scrapes the first result, runs one calculation when the agent
+has the calculator, then gives its final answer. The step to take is read
+from the actions already in the agent scratchpad, so concurrent agents can
+share one instance.
+"""
+import json
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.llms import LLM
+
+SEARCH = "Search the internet"
+SCRAPE = "Scrape website content"
+CALCULATE = "Make a calculation"
+TAKEN_ACTION = re.compile(rf"^Action: ({SEARCH}|{SCRAPE}|{CALCULATE})\s*$", re.M)
+SUBJECT = re.compile(r"^\s*(?:City|City Options): (.+)$", re.M)
+
+
+class ScriptedLLM(LLM):
+  """Emits search, scrape, optional calculate and final answer steps."""
+
+  latency: float = 0.0
+
+  @property
+  def _llm_type(self):
+    return "scripted"
+
+  def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+    if self.latency:
+      time.sleep(self.latency)
+    steps = len(TAKEN_ACTION.findall(prompt))
+    subject = SUBJECT.search(prompt)
+    subject = subject.group(1).strip() if subject else "the selected city"
+
+    if steps == 0:
+      return self._action(f"I should look up {subject}.", SEARCH, {"query": f"{subject} travel guide"})
+    if steps == 1:
+      slug = "-".join(f"{subject} travel guide".lower().split())
+      return self._action("The first result looks useful, I will read it.", SCRAPE,
+                          {"website": f"https://example.com/{slug}/1"})
+    if steps == 2 and CALCULATE in prompt:
+      return self._action("I should compute the budget.", CALCULATE,
+                          {"operation": "flights = 2 * 180\nhotel = 7 * 120\nfood = 7 * 45\ntotal = flights + hotel + food"})
+    return (
+        "Thought: I now know the final answer\n"
+        f"Final Answer: {subject} is a great choice. Spring and early autumn have warm weather, "
+        "return flights cost between 90 and 350 euros and a week costs around 1,515 euros "
+        "with flights, a riverside hotel and meals. Highlights are the castle walls, the "
+        "historic tram, the covered market and a day trip to the palaces in the hills.")
+
+  @staticmethod
+  def _action(thought, tool, arguments):
+    return f"Thought: {thought}\nAction: {tool}\nAction Input: {json.dumps(arguments)}"
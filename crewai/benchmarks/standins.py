@@ -0,0 +1,207 @@
+"""Local HTTP stand-ins for the services used by the trip crew.
+
+Each stand-in is a context manager that serves on a free local port:
+
+    with OllamaStandIn(latency=0.5) as ollama:
+        os.environ["OLLAMA_BASE_URL"] = ollama.base_url
+"""
+import json
+import os
+import threading
+import time
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class StandInServer:
+  """Base class: subclasses implement handle(path, body) -> (status, content_type, body)."""
+
+  def __init__(self, host="127.0.0.1", port=0):
+    standin = self
+    self.requests = 0
+    self._lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = "HTTP/1.1"
+
+      def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        with standin._lock:
+          standin.requests += 1
+        status, content_type, payload = standin.handle(self.path, body)
+        if isinstance(payload, (bytes, str)):
+          payload = payload.encode() if isinstance(payload, str) else payload
+          self.send_response(status)
+          self.send_header("Content-Type", content_type)
+          self.send_header("Content-Length", str(len(payload)))
+          self.end_headers()
+          self.wfile.write(payload)
+          return
+        # Iterables of lines are streamed with chunked transfer encoding
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for line in payload:
+          data = line.encode()
+          self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+          self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+      def log_message(self, *args):
+        pass
+
+    self.server = ThreadingHTTPServer((host, port), Handler)
+    self.server.daemon_threads = True
+    self.base_url = f"http://{host}:{self.server.server_address[1]}"
+
+  def handle(self, path, body):
+    raise NotImplementedError
+
+  def __enter__(self):
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    return self
+
+  def __exit__(self, *exc):
+    self.server.shutdown()
+    self.server.server_close()
+
+
+class OllamaStandIn(StandInServer):
+  """Answers /api/generate with a streamed reply after a fixed latency.
+
+  `reply` is either a string or a callable taking the prompt. The latency is
+  spent before the first token (prefill) and `token_latency` between tokens.
+  """
+
+  def __init__(self, reply="This is a summary.", latency=0.5, token_latency=0.0, **kwargs):
+    super().__init__(**kwargs)
+    self.reply = reply
+    self.latency = latency
+    self.token_latency = token_latency
+
+  def handle(self, path, body):
+    request = json.loads(body or b"{}")
+    prompt = request.get("prompt", "")
+    reply = self.reply(prompt) if callable(self.reply) else self.reply
+    return 200, "application/x-ndjson", self._stream(request, prompt, reply)
+
+  def _stream(self, request, prompt, reply):
+    start = time.perf_counter()
+    time.sleep(self.latency)
+    prompt_eval = time.perf_counter() - start
+    tokens = reply.split(" ")
+    for i, token in enumerate(tokens):
+      if i and self.token_latency:
+        time.sleep(self.token_latency)
+      text = token if i == 0 else " " + token
+      yield json.dumps({"model": request.get("model"), "response": text, "done": False}) + "\n"
+    total = time.perf_counter() - start
+    yield json.dumps({
+        "model": request.get("model"),
+        "response": "",
+        "done": True,
+        "context": list(range(len(prompt.split()) + len(tokens))),
+        "prompt_eval_count": len(prompt.split()),
+        "prompt_eval_duration": int(prompt_eval * 1e9),
+        "eval_count": len(tokens),
+        "eval_duration": int((total - prompt_eval) * 1e9),
+        "total_duration": int(total * 1e9),
+    }) + "\n"
+
+
+class SerperStandIn(StandInServer):
+  """Answers Serper /search requests with deterministic organic results."""
+
+  def __init__(self, latency=0.3, results_per_query=8, **kwargs):
+    super().__init__(**kwargs)
+    self.latency = latency
+    self.results_per_query = results_per_query
+
+  def handle(self, path, body):
+    query = json.loads(body or b"{}").get("q", "")
+    time.sleep(self.latency)
+    slug = "-".join(query.lower().split())
+    organic = [{
+        "title": f"{query} - result {i + 1}",
+        "link": f"https://example.com/{slug}/{i + 1}",
+        "snippet": f"Everything you need to know about {query} (result {i + 1}).",
+        "position": i + 1,
+    } for i in range(self.results_per_query)]
+    return 200, "application/json", json.dumps({"searchParameters": {"q": query}, "organic": organic})
+
+
+class BrowserlessStandIn(StandInServer):
+  """Answers browserless /content requests with fixture HTML pages.
+
+  `pages` maps URLs to HTML; any other URL gets `default_page` with the URL
+  filled in for `{url}`, so every link returned by the Serper stand-in can be
+  scraped.
+  """
+
+  def __init__(self, pages=None, default_page=None, latency=0.5, **kwargs):
+    super().__init__(**kwargs)
+    self.pages = pages or {}
+    self.default_page = default_page or load_fixture("city_guide.html")
+    self.latency = latency
+
+  def handle(self, path, body):
+    url = json.loads(body or b"{}").get("url", "")
+    time.sleep(self.latency)
+    page = self.pages.get(url, self.default_page.replace("{url}", url))
+    return 200, "text/html; charset=utf-8", page
+
+
+def load_fixture(name):
+  with open(os.path.join(FIXTURES_DIR, name)) as f:
+    return f.read()
+
+
+class _BlockTextParser(HTMLParser):
+  """Collects the text of each block-level element of a page."""
+
+  BLOCKS = {"title", "h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "td", "th", "pre", "blockquote"}
+  SKIPPED = {"script", "style"}
+
+  def __init__(self):
+    super().__init__()
+    self.elements = []
+    self._text = []
+    self._skipping = 0
+
+  def _flush(self):
+    text = " ".join(" ".join(self._text).split())
+    if text:
+      self.elements.append(text)
+    self._text = []
+
+  def handle_starttag(self, tag, attrs):
+    if tag in self.SKIPPED:
+      self._skipping += 1
+    elif tag in self.BLOCKS:
+      self._flush()
+
+  def handle_endtag(self, tag):
+    if tag in self.SKIPPED:
+      self._skipping = max(self._skipping - 1, 0)
+    elif tag in self.BLOCKS:
+      self._flush()
+
+  def handle_data(self, data):
+    if not self._skipping:
+      self._text.append(data)
+
+
+def partition_html(text):
+  """Offline stand-in for unstructured's partition_html: one element per block.
+
+  The real one needs NLTK's punkt data, which is downloaded on first use.
+  """
+  parser = _BlockTextParser()
+  parser.feed(text)
+  parser.close()
+  parser._flush()
+  return parser.elements
@@ -1,3 +1,4 @@
+from contextlib import nullcontext
 from crewai import Crew
 from textwrap import dedent
 from trip_agents import TripAgents
@@ -5,35 +6,63 @@ from trip_tasks import TripTasks
 
 from dotenv import load_dotenv
 from langchain.llms import Ollama
+from llm_cache import configure_llm_cache
+from tracing import TRACE_DIR, Tracer
 
 load_dotenv()
 
+# Record/replay every LLM call of the crew (see LLM_CACHE_MODE)
+configure_llm_cache()
+
 # Initialize Ollama LLM
 llm = Ollama(model="llama3.2")
 
 class TripCrew:
 
-  def __init__(self, origin, cities, date_range, interests):
+  def __init__(self, origin, cities, date_range, interests, verbose=True, trace_dir=TRACE_DIR):
     self.cities = cities
     self.origin = origin
     self.interests = interests
     self.date_range = date_range
+    self.verbose = verbose
+    # Directory the JSON trace of each run is written to; None disables tracing
+    self.trace_dir = trace_dir
+    self.tracer = None
 
   def run(self):
+    self.tracer = Tracer("trip_crew") if self.trace_dir else None
+
     # Pass the Ollama LLM to TripAgents
-    agents = TripAgents(llm)
+    agents = TripAgents(llm, verbose=self.verbose, tracer=self.tracer)
     tasks = TripTasks()
 
     city_selector_agent = agents.city_selection_agent()
     local_expert_agent = agents.local_expert()
     travel_concierge_agent = agents.travel_concierge()
 
+    # Research every candidate city concurrently, each with its own agent,
+    # and reduce the reports into the selection decision
+    research_agents, research_tasks = [], []
+    candidate_cities = [city.strip() for city in self.cities.split(",") if city.strip()]
+    if len(candidate_cities) > 1:
+      for city in candidate_cities:
+        research_agent = agents.city_selection_agent()
+        research_agents.append(research_agent)
+        research_tasks.append(tasks.research_city_task(
+          research_agent,
+          self.origin,
+          city,
+          self.interests,
+          self.date_range
+        ))
+
     identify_task = tasks.identify_task(
       city_selector_agent,
       self.origin,
       self.cities,
       self.interests,
-      self.date_range
+      self.date_range,
+      research_tasks=research_tasks or None
     )
     gather_task = tasks.gather_task(
       local_expert_agent,
@@ -50,13 +79,19 @@ class TripCrew:
 
     crew = Crew(
       agents=[
+        *research_agents,
         city_selector_agent, local_expert_agent, travel_concierge_agent
       ],
-      tasks=[identify_task, gather_task, plan_task],
-      verbose=True
+      tasks=[*research_tasks, identify_task, gather_task, plan_task],
+      verbose=self.verbose
     )
 
-    result = crew.kickoff()
+    with self.tracer.run(origin=self.origin, cities=self.cities) if self.tracer else nullcontext():
+      result = crew.kickoff()
+
+    if self.tracer:
+      trace_path = self.tracer.write(self.trace_dir)
+      print(f"\n{self.tracer.summary_table()}\nTrace written to {trace_path}")
     return result
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+"""Tests of the safe calculator engine.
+
+Run from the crewai directory:
+
+    python -m pytest tests
+"""
+import pytest
+
+from tools.calculator_tools import CalculationError, CalculatorTools, evaluate, evaluate_batch
+
+
+def calculate(operation):
+  return CalculatorTools.calculate.run(operation)
+
+
+def test_arithmetic():
+  assert evaluate("200*7") == 1400
+  assert evaluate("5000/2*10") == 25000
+  assert evaluate("max(2, 3) + abs(-1) + round(2.6)") == 7
+  assert evaluate("$1.5 × 2") == 3
+
+
+def test_money_is_exact_to_the_cent():
+  assert calculate("money: 0.1 + 0.2") == "0.30"
+  assert calculate("hotel = 120 * 7\nfood = 45 * 7\ntotal = hotel + food") == (
+      "hotel = 840.00\nfood = 315.00\ntotal = 1,155.00")
+
+
+def test_round_to_the_cent_in_money_mode():
+  assert calculate("money: round(10/3, 2)") == "3.33"
+  assert calculate("a = 10\nper_person = round(a / 3, 2)") == "a = 10.00\nper_person = 3.33"
+  assert evaluate("round(2.675, 1)") == 2.7
+  assert calculate("money: round(1, 1.5)").startswith("Error: round() needs a whole number of digits")
+
+
+def test_error_messages_name_the_mistake():
+  assert calculate("round(1.5, ndigits=1)") == (
+      "Error: Keyword arguments are not allowed, pass them by position to round()")
+  assert calculate("abs=3") == "Error: 'abs' is a function and cannot be assigned a value"
+  assert calculate("a = 1\na = 2") == "Error: 'a' is defined more than once"
+
+
+def test_batch_resolves_dependencies_and_rejects_cycles():
+  assert dict(evaluate_batch(["total = a + b", "a = 1", "b = a * 2"])) == {"total": 3, "a": 1, "b": 2}
+  with pytest.raises(CalculationError):
+    evaluate_batch(["a = b", "b = a"])
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('true')",
+    "open('/etc/passwd')",
+    "(1).__class__",
+    "[1, 2]",
+    "'a' * 3",
+    "lambda: 1",
+    "1 if 1 else 2",
+    "1 << 10",
+    "round(1.5, ndigits=1)",
+])
+def test_only_whitelisted_syntax_is_allowed(expression):
+  with pytest.raises(CalculationError):
+    evaluate(expression)
+
+
+@pytest.mark.parametrize("operation", [
+    "9**9**9",
+    "(((9**100)**100)**100)**100",
+    "10**100 * 10**100 * 10**100 * 10**100",
+    "money: 10**100*10**100",
+    "a = 1e999",
+    "money: 1e999",
+    pytest.param("-" * 100000 + "1", id="deeply-nested"),
+    pytest.param("(" * 100000 + "1" + ")" * 100000, id="deeply-parenthesized"),
+])
+def test_huge_or_deep_expressions_return_errors(operation):
+  assert calculate(operation).startswith("Error:")
+
+
+def test_division_by_zero():
+  assert calculate("1/0").startswith("Error: Division by zero")
@@ -0,0 +1,48 @@
+"""Tests of page element deduplication and chunk packing.
+
+Run from the crewai directory:
+
+    python -m pytest tests
+"""
+from tools.chunking import BoilerplateTracker, deduplicate, estimate_tokens, pack_elements
+
+NAV = "Home | Hotels | Flights | Contact"
+
+
+def test_exact_duplicates_are_dropped_within_a_page():
+  kept, duplicates, boilerplate = deduplicate(["Opening hours 9-17", "Opening hours 9-17", "Tickets 12 EUR"],
+                                              tracker=None)
+  assert kept == ["Opening hours 9-17", "Tickets 12 EUR"]
+  assert (duplicates, boilerplate) == (1, 0)
+
+
+def test_short_text_is_boilerplate_only_once_repeated_on_enough_pages():
+  tracker = BoilerplateTracker(min_pages=3)
+  drops = [tracker.is_boilerplate("example.com", f"https://example.com/{page}", NAV) for page in "abcd"]
+  assert drops == [False, False, True, True]
+  # The first page keeps it, however often it is scraped again
+  assert not tracker.is_boilerplate("example.com", "https://example.com/a", NAV)
+  # Other sites are tracked separately
+  assert not tracker.is_boilerplate("example.org", "https://example.org/e", NAV)
+
+
+def test_content_shared_by_two_pages_is_kept():
+  tracker = BoilerplateTracker(min_pages=3)
+  first = deduplicate([NAV, "Room from 80 EUR"], "example.com", "https://example.com/a", tracker)
+  second = deduplicate([NAV, "Room from 80 EUR"], "example.com", "https://example.com/b", tracker)
+  assert first[0] == second[0] == [NAV, "Room from 80 EUR"]
+
+
+def test_tracker_is_bounded():
+  tracker = BoilerplateTracker(min_pages=2, max_entries=2)
+  for text in ("one", "two", "three"):
+    tracker.is_boilerplate("example.com", "https://example.com/a", text)
+  # "one" was evicted, so a second page does not see it as repeated
+  assert not tracker.is_boilerplate("example.com", "https://example.com/b", "one")
+  assert tracker.is_boilerplate("example.com", "https://example.com/b", "three")
+
+
+def test_oversized_words_are_sliced_to_the_budget():
+  chunks = pack_elements(["x" * 5000, "short"], budget=100)
+  assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+  assert "".join(chunks).replace("\n\n", "").replace(" ", "").startswith("x" * 5000)
@@ -1,38 +1,115 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 
 import requests
-from crewai import Agent, Task
+from langchain.llms import Ollama
 from langchain.tools import tool
 from unstructured.partition.html import partition_html
 
+import tracing
+from tools.cache import content_hash, page_cache, summary_cache
+from tools.chunking import NUM_CTX, estimate_tokens, plan_chunks, token_budget
+
+BROWSERLESS_URL = os.environ.get("BROWSERLESS_URL", "https://chrome.browserless.io")
+# Number of chunk summaries requested from Ollama at the same time
+SUMMARY_PARALLELISM = int(os.environ.get("SUMMARY_PARALLELISM", "4"))
+
+MAP_PROMPT = (
+    "Analyze and summarize the content bellow, make sure to include the most "
+    "relevant information in the summary, return only the summary nothing else."
+    "\n\nCONTENT\n----------\n{content}")
+REDUCE_PROMPT = (
+    "Merge the partial summaries bellow, all taken from the same web page, into "
+    "a single summary. Keep every relevant fact, remove repetitions and return "
+    "only the summary nothing else.\n\nSUMMARIES\n----------\n{content}")
+
+# One summarizer shared by every chunk and every scrape
+summarizer_llm = Ollama(
+    model=os.environ.get("OLLAMA_MODEL", "llama3.2"),
+    base_url=os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434"),
+    num_ctx=NUM_CTX)
+
+# Content tokens that fit in one map or reduce prompt
+MAP_BUDGET = token_budget(MAP_PROMPT)
+REDUCE_BUDGET = token_budget(REDUCE_PROMPT)
+
+
+def summarize(content, prompt=MAP_PROMPT):
+  prompt = prompt.format(content=content)
+  key = content_hash(summarizer_llm.model, prompt)
+  summary = summary_cache.get(key)
+  if summary is None:
+    summary = summarizer_llm.invoke(prompt, config={"callbacks": tracing.llm_callbacks("summarizer")})
+    summary_cache.set(key, summary)
+  return summary
+
+
+def fetch_elements(website):
+  """Fetch a page through browserless and partition it, reusing recent fetches."""
+  elements = page_cache.get(website)
+  if elements is not None:
+    return elements
+  url = f"{BROWSERLESS_URL}/content?token={os.environ['BROWSERLESS_API_KEY']}"
+  payload = json.dumps({"url": website})
+  headers = {'cache-control': 'no-cache', 'content-type': 'application/json'}
+  with tracing.span("http", "browserless", url=website):
+    response = requests.request("POST", url, headers=headers, data=payload)
+  with tracing.span("parse", "partition_html"):
+    elements = [str(el) for el in partition_html(text=response.text)]
+  if response.ok:
+    page_cache.set(website, elements)
+  return elements
+
+
+def _group_summaries(summaries, max_tokens):
+  """Pack consecutive summaries into groups that fit in one reduce prompt."""
+  groups, group, size = [], [], 0
+  for summary in summaries:
+    tokens = estimate_tokens(summary)
+    # Every group takes at least two summaries so that each round shrinks
+    if len(group) >= 2 and size + tokens > max_tokens:
+      groups.append(group)
+      group, size = [], 0
+    group.append(summary)
+    size += tokens
+  if len(group) == 1 and groups:
+    groups[-1].append(group[0])
+  elif group:
+    groups.append(group)
+  return groups
+
+
+def map_reduce_summarize(chunks, parallelism=SUMMARY_PARALLELISM, max_tokens=REDUCE_BUDGET):
+  """Summarize chunks concurrently, then merge the summaries hierarchically."""
+  if not chunks:
+    return ""
+  with ThreadPoolExecutor(max_workers=max(1, parallelism)) as pool:
+    with tracing.span("summarize", "map", chunks=len(chunks)):
+      summaries = list(pool.map(tracing.bind(summarize), chunks))
+    while len(summaries) > 1:
+      groups = _group_summaries(summaries, max_tokens)
+      with tracing.span("summarize", "reduce", groups=len(groups)):
+        summaries = list(pool.map(tracing.bind(
+            lambda group: summarize("\n\n".join(group), REDUCE_PROMPT)), groups))
+  return summaries[0]
+
 
 class BrowserTools():
 
   @tool("Scrape website content")
   def scrape_and_summarize_website(website):
     """Useful to scrape and summarize a website content"""
-    url = f"https://chrome.browserless.io/content?token={os.environ['BROWSERLESS_API_KEY']}"
-    payload = json.dumps({"url": website})
-    headers = {'cache-control': 'no-cache', 'content-type': 'application/json'}
-    response = requests.request("POST", url, headers=headers, data=payload)
-    elements = partition_html(text=response.text)
-    content = "\n\n".join([str(el) for el in elements])
-    content = [content[i:i + 8000] for i in range(0, len(content), 8000)]
-    summaries = []
-    for chunk in content:
-      agent = Agent(
-          role='Principal Researcher',
-          goal=
-          'Do amazing researches and summaries based on the content you are working with',
-          backstory=
-          "You're a Principal Researcher at a big company and you need to do a research about a given topic.",
-          allow_delegation=False)
-      task = Task(
-          agent=agent,
-          description=
-          f'Analyze and summarize the content bellow, make sure to include the most relevant information in the summary, return only the summary nothing else.\n\nCONTENT\n----------\n{chunk}'
-      )
-      summary = task.execute()
-      summaries.append(summary)
-    return "\n\n".join(summaries)
\ No newline at end of file
+    elements = fetch_elements(website)
+    plan = plan_chunks(elements, MAP_BUDGET, host=urlparse(website).netloc, url=website)
+    # Keyed on the chunks, not the raw page, so the summary matches what deduplication kept
+    key = content_hash(summarizer_llm.model, *plan.chunks)
+    summary = summary_cache.get(key)
+    if summary is None:
+      with tracing.span("summarize", "page", url=website, elements=plan.elements,
+                        duplicates=plan.duplicates, boilerplate=plan.boilerplate,
+                        llm_calls=plan.llm_calls, legacy_llm_calls=plan.legacy_llm_calls):
+        summary = map_reduce_summarize(plan.chunks)
+      summary_cache.set(key, summary)
+    return summary
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.environ.get(
+    "TRIP_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "trip_cache.sqlite3"))
+# Fetched pages go stale, summaries of a given content never do
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", str(24 * 60 * 60)))
+
+
+def content_hash(*parts):
+  digest = hashlib.sha256()
+  for part in parts:
+    digest.update(part.encode("utf-8"))
+    digest.update(b"\0")
+  return digest.hexdigest()
+
+
+class SQLiteCache():
+  """A persistent key/value store with an optional TTL.
+
+  All caches live in one SQLite file, separated by namespace, so they can be
+  shared by every agent, every `TripCrew.run` and concurrent processes.
+  """
+
+  _connections = {}
+  _lock = threading.Lock()
+
+  def __init__(self, namespace, ttl=None, path=CACHE_PATH):
+    self.namespace = namespace
+    self.ttl = ttl
+    self.path = path
+    self.hits = 0
+    self.misses = 0
+
+  def _connection(self):
+    with SQLiteCache._lock:
+      connection = SQLiteCache._connections.get(self.path)
+      if connection is None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("""
+          CREATE TABLE IF NOT EXISTS entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key))""")
+        SQLiteCache._connections[self.path] = connection
+      return connection
+
+  def get(self, key):
+    """Return the cached value, or None when it is missing or expired."""
+    connection = self._connection()
+    with SQLiteCache._lock:
+      row = connection.execute(
+          "SELECT value, created_at FROM entries WHERE namespace = ? AND key = ?",
+          (self.namespace, key)).fetchone()
+    if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+      self.misses += 1
+      return None
+    self.hits += 1
+    return json.loads(row[0])
+
+  def set(self, key, value):
+    connection = self._connection()
+    with SQLiteCache._lock:
+      connection.execute(
+          "INSERT OR REPLACE INTO entries (namespace, key, value, created_at) VALUES (?, ?, ?, ?)",
+          (self.namespace, key, json.dumps(value), time.time()))
+
+  def clear(self):
+    connection = self._connection()
+    with SQLiteCache._lock:
+      connection.execute("DELETE FROM entries WHERE namespace = ?", (self.namespace,))
+
+
+# Level 1: URL -> partitioned page elements, Level 2: content hash -> LLM summary
+page_cache = SQLiteCache("pages", ttl=PAGE_CACHE_TTL)
+summary_cache = SQLiteCache("summaries")
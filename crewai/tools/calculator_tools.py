@@ -1,15 +1,214 @@
+import ast
+import operator
+import re
+from decimal import ROUND_HALF_UP, Decimal, DecimalException
+from functools import lru_cache
+
 from langchain.tools import tool
 
+MAX_EXPONENT = 100
+# Integer results are kept below this size (about 10**308, the range of a float)
+MAX_BITS = 1024
+CENTS = Decimal("0.01")
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+ASSIGNMENT = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*[=:]\s*(.+)$")
+
+
+class CalculationError(Exception):
+    pass
+
+
+def _check_size(value):
+    if isinstance(value, int) and value.bit_length() > MAX_BITS:
+        raise CalculationError("Result is too large")
+    return value
+
+
+def _pow(base, exponent):
+    if abs(exponent) > MAX_EXPONENT:
+        raise CalculationError(f"Exponent {exponent} is too large")
+    # Check the size before computing it, or `((9**99)**99)**99` still hangs
+    if isinstance(base, int) and isinstance(exponent, int) and base.bit_length() * exponent > MAX_BITS:
+        raise CalculationError("Result is too large")
+    return operator.pow(base, exponent)
+
+
+def _mul(left, right):
+    if isinstance(left, int) and isinstance(right, int) and left.bit_length() + right.bit_length() > MAX_BITS + 1:
+        raise CalculationError("Result is too large")
+    return operator.mul(left, right)
+
+
+def _round(value, ndigits=None):
+    if ndigits is None:
+        return round(value)
+    # In money mode every literal is a Decimal, `round(x, 2)` included
+    if ndigits != int(ndigits):
+        raise CalculationError(f"round() needs a whole number of digits, got {ndigits}")
+    return round(value, int(ndigits))
+
+
+FUNCTIONS = {"abs": abs, "min": min, "max": max, "round": _round}
+
+
+class _Compiler(ast.NodeTransformer):
+    """Rejects anything but arithmetic and rewrites the tree for evaluation."""
+
+    def __init__(self, money):
+        self.money = money
+        self.names = set()
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, BINARY_OPERATORS):
+            raise CalculationError(f"Operator {type(node.op).__name__} is not allowed")
+        node = self.generic_visit(node)
+        # Bounded results keep `9**9**9` from hanging the crew
+        if isinstance(node.op, ast.Pow):
+            return ast.Call(func=ast.Name(id="_pow", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        if isinstance(node.op, ast.Mult):
+            return ast.Call(func=ast.Name(id="_mul", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        return node
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, UNARY_OPERATORS):
+            raise CalculationError(f"Operator {type(node.op).__name__} is not allowed")
+        return self.generic_visit(node)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise CalculationError(f"Only numbers are allowed, got {node.value!r}")
+        if self.money:
+            return ast.Call(func=ast.Name(id="Decimal", ctx=ast.Load()), args=[ast.Constant(repr(node.value))], keywords=[])
+        return node
+
+    def visit_Name(self, node):
+        self.names.add(node.id)
+        return node
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise CalculationError("Only abs, min, max and round can be called")
+        if node.keywords:
+            raise CalculationError(f"Keyword arguments are not allowed, pass them by position to {node.func.id}()")
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def generic_visit(self, node):
+        if not isinstance(node, (ast.BinOp, ast.UnaryOp) + BINARY_OPERATORS + UNARY_OPERATORS):
+            raise CalculationError(f"{type(node).__name__} is not allowed in a calculation")
+        return super().generic_visit(node)
+
+
+def _normalize(expression):
+    expression = expression.strip().strip("`")
+    expression = re.sub(r"[$€£¥]", "", expression)
+    return expression.replace("×", "*").replace("÷", "/").replace("^", "**")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression, money=False):
+    """Validate and compile an expression once; returns (code, referenced names)."""
+    compiler = _Compiler(money)
+    try:
+        tree = ast.parse(expression, mode="eval")
+        tree = ast.fix_missing_locations(compiler.visit(tree))
+        return compile(tree, "<calculation>", "eval"), frozenset(compiler.names)
+    except SyntaxError:
+        raise CalculationError(f"Invalid syntax in mathematical expression: {expression}")
+    except (RecursionError, MemoryError):
+        # The parser and the compiler run out of stack on deeply nested input
+        raise CalculationError("The expression is nested too deeply")
+
+
+def evaluate(expression, variables=None, money=False):
+    """Evaluate an arithmetic expression, using Decimal arithmetic in money mode."""
+    code, names = compile_expression(_normalize(expression), money)
+    variables = variables or {}
+    missing = sorted(names - variables.keys())
+    if missing:
+        raise CalculationError(f"Unknown name(s): {', '.join(missing)}")
+    scope = {"__builtins__": {}, "_pow": _pow, "_mul": _mul, "Decimal": Decimal, **FUNCTIONS, **variables}
+    try:
+        return _check_size(eval(code, scope))
+    except ZeroDivisionError:
+        raise CalculationError(f"Division by zero in: {expression}")
+    except (DecimalException, OverflowError, TypeError, ValueError) as e:
+        raise CalculationError(f"Cannot evaluate {expression}: {e}")
+
+
+def evaluate_batch(lines, money=True):
+    """Evaluate `name = expression` lines in dependency order.
+
+    Returns the (name, value) pairs in the order the lines were given.
+    """
+    expressions = {}
+    for i, line in enumerate(lines, 1):
+        match = ASSIGNMENT.match(line)
+        name, expression = match.groups() if match else (f"line_{i}", line)
+        if name in FUNCTIONS:
+            raise CalculationError(f"'{name}' is a function and cannot be assigned a value")
+        if name in expressions:
+            raise CalculationError(f"'{name}' is defined more than once")
+        expressions[name] = expression
+
+    dependencies = {
+        name: compile_expression(_normalize(expression), money)[1] & expressions.keys()
+        for name, expression in expressions.items()
+    }
+    values, visiting = {}, set()
+
+    def resolve(name):
+        if name in values:
+            return values[name]
+        if name in visiting:
+            raise CalculationError(f"Circular definition involving '{name}'")
+        visiting.add(name)
+        for dependency in dependencies[name]:
+            resolve(dependency)
+        values[name] = evaluate(expressions[name], values, money)
+        visiting.discard(name)
+        return values[name]
+
+    return [(name, resolve(name)) for name in expressions]
+
+
+def format_money(value):
+    return f"{Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP):,}"
+
+
 class CalculatorTools():
 
     @tool("Make a calculation")
     def calculate(operation):
-        """Useful to perform any mathematical calculations, 
+        """Useful to perform any mathematical calculations,
         like sum, minus, multiplication, division, etc.
-        The input to this tool should be a mathematical 
-        expression, a couple examples are `200*7` or `5000/2*10`
+        The input to this tool should be a mathematical
+        expression, a couple examples are `200*7` or `5000/2*10`.
+        To compute a whole budget in one call, give one named
+        expression per line; lines can use the names defined on
+        other lines and money is computed exactly to the cent, e.g.
+        `hotel = 120 * 7`, `food = 45 * 7`, `total = hotel + food`,
+        `total_eur = total * 0.92`.
+        Prefix a single expression with `money:` for exact currency math.
         """
         try:
-            return eval(operation)
-        except SyntaxError:
-            return "Error: Invalid syntax in mathematical expression"
\ No newline at end of file
+            operation = operation.strip()
+            if operation.lower().startswith("money:"):
+                return format_money(evaluate(operation[len("money:"):], money=True))
+            lines = [line for line in re.split(r"[\n;]", operation) if line.strip()]
+            if len(lines) == 1 and not ASSIGNMENT.match(lines[0]):
+                return evaluate(lines[0])
+            return "\n".join(f"{name} = {format_money(value)}" for name, value in evaluate_batch(lines))
+        except CalculationError as e:
+            return f"Error: {e}"
+        except (DecimalException, ValueError) as e:
+            # Values too large to print, or to round to the cent
+            return f"Error: Cannot format the result: {e}"
+        except RecursionError:
+            return "Error: The expression is nested too deeply"
@@ -0,0 +1,205 @@
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+
+# Context window requested from Ollama; chunks are packed to fit inside it
+NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", "8192"))
+# Tokens kept free for the generated summary
+SUMMARY_TOKENS = 1024
+# Size of the fixed character windows used before token-aware chunking
+LEGACY_CHUNK_SIZE = 8000
+
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+# Elements this short are compared exactly, and tracked as site-wide boilerplate
+BOILERPLATE_MAX_WORDS = 30
+# Distinct pages of a site an element must appear on before it counts as boilerplate
+BOILERPLATE_MIN_PAGES = 3
+# Short elements remembered across all sites, least recently seen evicted first
+BOILERPLATE_MAX_ENTRIES = 50000
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], "big") % _MERSENNE_PRIME or 1,
+     int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], "big") % _MERSENNE_PRIME)
+    for i in range(MINHASH_PERMUTATIONS)
+]
+
+ChunkPlan = namedtuple("ChunkPlan", [
+    "chunks", "elements", "duplicates", "boilerplate", "llm_calls", "legacy_llm_calls"])
+
+
+def estimate_tokens(text):
+  """Approximate the token count of text for Llama-style tokenizers."""
+  return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 4 / 3))
+
+
+def token_budget(prompt_template, num_ctx=NUM_CTX, summary_tokens=SUMMARY_TOKENS):
+  """Tokens left for content once the prompt and the summary are accounted for."""
+  return num_ctx - summary_tokens - estimate_tokens(prompt_template.format(content=""))
+
+
+def _normalize(text):
+  return " ".join(text.lower().split())
+
+
+def _fingerprint(text):
+  return hashlib.sha1(_normalize(text).encode()).hexdigest()
+
+
+def _minhash(text):
+  words = _normalize(text).split()
+  shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))}
+  hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+  return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def _similarity(signature, other):
+  return sum(x == y for x, y in zip(signature, other)) / len(signature)
+
+
+class BoilerplateTracker():
+  """Remembers short elements per site so navigation, banners and footers
+  repeated across its pages are dropped from the later ones.
+
+  An element counts as boilerplate once it has appeared on `min_pages`
+  distinct pages of a site, and it is never dropped from the first page that
+  had it, so short content a page shares with one sibling (a price, an
+  address) is kept. At most `max_entries` elements are remembered.
+  """
+
+  def __init__(self, min_pages=BOILERPLATE_MIN_PAGES, max_entries=BOILERPLATE_MAX_ENTRIES):
+    self.min_pages = min_pages
+    self.max_entries = max_entries
+    self._seen = OrderedDict()  # (host, fingerprint) -> [first url, set of urls]
+    self._lock = threading.Lock()
+
+  def is_boilerplate(self, host, url, text):
+    if not host or len(text.split()) > BOILERPLATE_MAX_WORDS:
+      return False
+    key = (host, _fingerprint(text))
+    with self._lock:
+      entry = self._seen.get(key)
+      if entry is None:
+        entry = self._seen[key] = [url, set()]
+        if len(self._seen) > self.max_entries:
+          self._seen.popitem(last=False)
+      else:
+        self._seen.move_to_end(key)
+      first_url, urls = entry
+      # Only min_pages urls are needed to know the threshold was reached
+      if len(urls) < self.min_pages:
+        urls.add(url)
+      return url != first_url and len(urls) >= self.min_pages
+
+  def clear(self):
+    with self._lock:
+      self._seen.clear()
+
+
+boilerplate_tracker = BoilerplateTracker()
+
+
+def deduplicate(elements, host=None, url=None, tracker=boilerplate_tracker):
+  """Drop exact and near-duplicate elements, keeping the first occurrence."""
+  kept, duplicates, boilerplate = [], 0, 0
+  fingerprints = set()
+  buckets = defaultdict(list)  # LSH band -> signatures of kept elements
+  rows = MINHASH_PERMUTATIONS // LSH_BANDS
+
+  for element in elements:
+    text = element.strip()
+    if not text:
+      continue
+    if tracker is not None and tracker.is_boilerplate(host, url, text):
+      boilerplate += 1
+      continue
+    fingerprint = _fingerprint(text)
+    if fingerprint in fingerprints:
+      duplicates += 1
+      continue
+    fingerprints.add(fingerprint)
+
+    if len(text.split()) > BOILERPLATE_MAX_WORDS:
+      signature = _minhash(text)
+      bands = [(band, signature[band * rows:(band + 1) * rows]) for band in range(LSH_BANDS)]
+      candidates = {other for band in bands for other in buckets[band]}
+      if any(_similarity(signature, other) >= NEAR_DUPLICATE_THRESHOLD for other in candidates):
+        duplicates += 1
+        continue
+      for band in bands:
+        buckets[band].append(signature)
+    kept.append(text)
+
+  return kept, duplicates, boilerplate
+
+
+def _split_words(sentence, budget):
+  """Group the words of a sentence into parts within the budget. Words that
+  alone exceed it (long URLs, inline scripts, CJK text) are sliced by characters."""
+  # About three quarters of the budget at four characters per token
+  size = max(budget * 3, 1)
+  parts, words, chars = [], [], 0
+  for word in sentence.split():
+    for piece in ([word] if estimate_tokens(word) <= budget else
+                  [word[i:i + size] for i in range(0, len(word), size)]):
+      added = chars + len(piece) + (1 if words else 0)
+      if words and max(math.ceil(added / 4), math.ceil((len(words) + 1) * 4 / 3)) > budget:
+        parts.append(" ".join(words))
+        words, added = [], len(piece)
+      words.append(piece)
+      chars = added
+  if words:
+    parts.append(" ".join(words))
+  return parts
+
+
+def _split_element(text, budget):
+  """Split an element that alone exceeds the budget on sentence, then word, boundaries."""
+  pieces, piece = [], ""
+  for sentence in re.split(r"(?<=[.!?])\s+", text):
+    parts = _split_words(sentence, budget) if estimate_tokens(sentence) > budget else [sentence]
+    for part in parts:
+      candidate = f"{piece} {part}".strip()
+      if piece and estimate_tokens(candidate) > budget:
+        pieces.append(piece)
+        candidate = part
+      piece = candidate
+  if piece:
+    pieces.append(piece)
+  return pieces
+
+
+def pack_elements(elements, budget):
+  """Pack whole elements into as few chunks as fit within the token budget."""
+  chunks, chunk, used = [], [], 0
+  for element in elements:
+    for piece in ([element] if estimate_tokens(element) <= budget else _split_element(element, budget)):
+      tokens = estimate_tokens(piece) + 1
+      if chunk and used + tokens > budget:
+        chunks.append("\n\n".join(chunk))
+        chunk, used = [], 0
+      chunk.append(piece)
+      used += tokens
+  if chunk:
+    chunks.append("\n\n".join(chunk))
+  return chunks
+
+
+def plan_chunks(elements, budget, host=None, url=None):
+  """Deduplicate page elements and pack them into token-budgeted chunks."""
+  kept, duplicates, boilerplate = deduplicate(elements, host=host, url=url)
+  chunks = pack_elements(kept, budget)
+  original = "\n\n".join(elements)
+  return ChunkPlan(
+      chunks=chunks,
+      elements=len(elements),
+      duplicates=duplicates,
+      boilerplate=boilerplate,
+      llm_calls=len(chunks),
+      legacy_llm_calls=math.ceil(len(original) / LEGACY_CHUNK_SIZE))
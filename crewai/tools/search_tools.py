@@ -1,8 +1,93 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from langchain.tools import tool
+from requests.adapters import HTTPAdapter
+
+import tracing
+from tools.cache import SQLiteCache
+
+SERPER_URL = os.environ.get("SERPER_URL", "https://google.serper.dev/search")
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", str(6 * 60 * 60)))
+# (connect, read) timeouts in seconds
+SEARCH_TIMEOUT = (3.05, 20)
+SEARCH_PARALLELISM = 8
+TOP_RESULTS = 4
+
+# One keep-alive session shared by every agent
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=SEARCH_PARALLELISM))
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=SEARCH_PARALLELISM))
+
+search_cache = SQLiteCache("search", ttl=SEARCH_CACHE_TTL)
+
+
+def normalize_query(query):
+  return " ".join(query.lower().split())
+
+
+def fetch_results(query):
+  """Return Serper's organic results for a query, or None when there are none."""
+  key = normalize_query(query)
+  results = search_cache.get(key)
+  if results is not None:
+    return results
+  headers = {
+      'X-API-KEY': os.environ['SERPER_API_KEY'],
+      'content-type': 'application/json'
+  }
+  with tracing.span("http", "serper", query=query):
+    response = session.post(SERPER_URL, headers=headers, data=json.dumps({"q": query}), timeout=SEARCH_TIMEOUT)
+  data = response.json()
+  # check if there is an organic key
+  if 'organic' not in data:
+    return None
+  results = data['organic']
+  search_cache.set(key, results)
+  return results
+
+
+def format_results(results):
+  string = []
+  for result in results:
+    try:
+      string.append('\n'.join([
+          f"Title: {result['title']}", f"Link: {result['link']}",
+          f"Snippet: {result['snippet']}", "\n-----------------"
+      ]))
+    except KeyError:
+      next
+  return '\n'.join(string)
+
+
+def search_many(queries, top_result_to_return=TOP_RESULTS, parallelism=SEARCH_PARALLELISM):
+  """Run several queries concurrently and merge their top results.
+
+  Results are interleaved so every query is represented, and a link returned
+  by more than one query is only kept once.
+  """
+  queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+  if not queries:
+    return []
+  with ThreadPoolExecutor(max_workers=min(parallelism, len(queries))) as pool:
+    result_lists = list(pool.map(tracing.bind(_fetch_or_empty), queries))
+
+  merged, seen = [], set()
+  for rank in range(top_result_to_return):
+    for results in result_lists:
+      if rank < len(results) and results[rank].get('link') not in seen:
+        seen.add(results[rank].get('link'))
+        merged.append(results[rank])
+  return merged
+
+
+def _fetch_or_empty(query):
+  try:
+    return fetch_results(query) or []
+  except (requests.RequestException, ValueError):
+    return []
 
 
 class SearchTools():
@@ -12,26 +97,20 @@ class SearchTools():
     """Useful to search the internet
     about a a given topic and return relevant results"""
     top_result_to_return = 4
-    url = "https://google.serper.dev/search"
-    payload = json.dumps({"q": query})
-    headers = {
-        'X-API-KEY': os.environ['SERPER_API_KEY'],
-        'content-type': 'application/json'
-    }
-    response = requests.request("POST", url, headers=headers, data=payload)
-    # check if there is an organic key
-    if 'organic' not in response.json():
+    try:
+      results = fetch_results(query)
+    except requests.Timeout:
+      return "Sorry, the search timed out, please try again."
+    if results is None:
+      return "Sorry, I couldn't find anything about that, there could be an error with you serper api key."
+    return format_results(results[:top_result_to_return])
+
+  @tool("Search the internet for several queries")
+  def search_internet_batch(queries):
+    """Useful to search the internet about several topics at once,
+    for example one query per candidate city. The input should be the
+    queries separated by `|`, like `weather in Rome in May|weather in Paris in May`"""
+    results = search_many(queries.split('|'))
+    if not results:
       return "Sorry, I couldn't find anything about that, there could be an error with you serper api key."
-    else:
-      results = response.json()['organic']
-      string = []
-      for result in results[:top_result_to_return]:
-        try:
-          string.append('\n'.join([
-              f"Title: {result['title']}", f"Link: {result['link']}",
-              f"Snippet: {result['snippet']}", "\n-----------------"
-          ]))
-        except KeyError:
-          next
-
-      return '\n'.join(string)
\ No newline at end of file
+    return format_results(results)
@@ -0,0 +1,289 @@
+"""Structured tracing of TripCrew runs.
+
+A `Tracer` records spans for the crew run, each task, every agent iteration,
+every LLM call (with prompt/completion token counts and tokens per second)
+and every tool invocation, plus the HTTP requests and chunk summaries made
+inside the tools. `TripCrew.run` writes the spans to a JSON trace file and
+prints an aggregated summary table.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from langchain_core.agents import AgentFinish
+from langchain_core.callbacks import BaseCallbackHandler
+
+TRACE_DIR = os.environ.get("TRIP_TRACE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces"))
+
+# The tracer and span that new spans of the current thread are attached to
+_context = threading.local()
+
+
+class Tracer():
+
+  def __init__(self, name="trip_crew"):
+    self.name = name
+    self.spans = []
+    self.root = None
+    self.started_at = time.time()
+    self._origin = time.perf_counter()
+    self._ids = itertools.count(1)
+    self._lock = threading.Lock()
+    self._agents = {}
+    self._agent_names = Counter()
+
+  def _now(self):
+    return round(time.perf_counter() - self._origin, 6)
+
+  def start_span(self, kind, name, parent=None, **attributes):
+    span = {
+        "id": next(self._ids),
+        "parent": parent["id"] if parent else None,
+        "kind": kind,
+        "name": name,
+        "thread": threading.current_thread().name,
+        "start": self._now(),
+        "end": None,
+        "duration": None,
+        "attributes": attributes,
+    }
+    with self._lock:
+      self.spans.append(span)
+    return span
+
+  def end_span(self, span, **attributes):
+    if span is None or span["end"] is not None:
+      return
+    span["end"] = self._now()
+    span["duration"] = round(span["end"] - span["start"], 6)
+    span["attributes"].update(attributes)
+
+  @contextmanager
+  def span(self, kind, name, parent=None, **attributes):
+    """Record a span and make it the parent of spans started inside it on this thread."""
+    span = self.start_span(kind, name, parent, **attributes)
+    previous = (getattr(_context, "tracer", None), getattr(_context, "span", None))
+    _context.tracer, _context.span = self, span
+    try:
+      yield span
+    except Exception as e:
+      span["attributes"]["error"] = f"{type(e).__name__}: {e}"
+      raise
+    finally:
+      _context.tracer, _context.span = previous
+      self.end_span(span)
+
+  @contextmanager
+  def run(self, **attributes):
+    with self.span("crew", self.name, **attributes) as root:
+      self.root = root
+      yield root
+    # Close whatever an interrupted agent left open
+    for state in self._agents.values():
+      self.end_span(state["iteration"])
+      self.end_span(state["task"])
+
+  # Agent instrumentation
+
+  def register_agent(self, role):
+    """Return a unique trace name for an agent; agents can share a role."""
+    with self._lock:
+      self._agent_names[role] += 1
+      count = self._agent_names[role]
+      name = role if count == 1 else f"{role} #{count}"
+      self._agents[name] = {"task": None, "iteration": None}
+    return name
+
+  def task_span(self, agent):
+    state = self._agents[agent]
+    if state["task"] is None:
+      state["task"] = self.start_span("task", agent, self.root)
+    return state["task"]
+
+  def iteration_span(self, agent):
+    state = self._agents[agent]
+    if state["iteration"] is None:
+      state["iteration"] = self.start_span("agent_iteration", agent, self.task_span(agent))
+    return state["iteration"]
+
+  def step_callback(self, agent):
+    """Closes the agent iteration after each step, and the task after the final answer."""
+    def on_step(step_output):
+      state = self._agents[agent]
+      self.end_span(state["iteration"])
+      state["iteration"] = None
+      if isinstance(step_output, AgentFinish):
+        self.end_span(state["task"])
+        state["task"] = None
+    return on_step
+
+  def llm_callbacks(self, agent):
+    return [LLMSpanHandler(self, agent, lambda: self.iteration_span(agent))]
+
+  def traced_tool(self, agent, tool):
+    """Return a copy of a LangChain tool that records a span around every call."""
+    func = tool.func
+
+    def traced(*args, **kwargs):
+      tool_input = ", ".join([str(arg) for arg in args] + [str(value) for value in kwargs.values()])
+      with self.span("tool", tool.name, self.iteration_span(agent), agent=agent, input=tool_input[:200]):
+        return func(*args, **kwargs)
+
+    return tool.copy(update={"func": traced})
+
+  # Reporting
+
+  def summary(self):
+    """Aggregate span durations, LLM tokens and per-task call counts."""
+    wall = self.root["duration"] if self.root and self.root["duration"] else self._now()
+    rows = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0})
+    tokens = {"prompt_tokens": 0, "completion_tokens": 0, "generation_seconds": 0.0}
+    for span in self.spans:
+      if span["duration"] is None or span["kind"] == "crew":
+        continue
+      row = rows[(span["kind"], span["name"])]
+      row["count"] += 1
+      row["total"] += span["duration"]
+      row["max"] = max(row["max"], span["duration"])
+      if span["kind"] == "llm":
+        attributes = span["attributes"]
+        tokens["prompt_tokens"] += attributes.get("prompt_tokens") or 0
+        tokens["completion_tokens"] += attributes.get("completion_tokens") or 0
+        tokens["generation_seconds"] += attributes.get("generation_seconds") or 0.0
+
+    return {
+        "wall_time": wall,
+        "spans": [
+            {"kind": kind, "name": name, "count": row["count"], "total": round(row["total"], 3),
+             "mean": round(row["total"] / row["count"], 3), "max": round(row["max"], 3),
+             "share": round(row["total"] / wall, 3) if wall else 0.0}
+            for (kind, name), row in sorted(rows.items(), key=lambda item: item[1]["total"], reverse=True)
+        ],
+        "tokens": {
+            **tokens,
+            "generation_seconds": round(tokens["generation_seconds"], 3),
+            "tokens_per_second": round(tokens["completion_tokens"] / tokens["generation_seconds"], 1)
+            if tokens["generation_seconds"] else None,
+        },
+        "tasks": self.task_stats(),
+    }
+
+  def task_stats(self):
+    """Count the LLM and tool calls made under every task span."""
+    by_id = {span["id"]: span for span in self.spans}
+    stats = {}
+    for span in self.spans:
+      if span["kind"] == "task":
+        stats[span["id"]] = {"task": span["name"], "duration": span["duration"], "llm_calls": 0, "tool_calls": 0}
+    for span in self.spans:
+      if span["kind"] not in ("llm", "tool"):
+        continue
+      parent = by_id.get(span["parent"])
+      while parent is not None and parent["kind"] != "task":
+        parent = by_id.get(parent["parent"])
+      if parent is not None:
+        stats[parent["id"]]["llm_calls" if span["kind"] == "llm" else "tool_calls"] += 1
+    return list(stats.values())
+
+  def summary_table(self):
+    summary = self.summary()
+    lines = [
+        f"{'kind':<16}{'name':<40}{'count':>7}{'total s':>10}{'mean s':>9}{'max s':>9}{'% wall':>8}",
+        "-" * 99,
+    ]
+    for row in summary["spans"]:
+      lines.append(
+          f"{row['kind']:<16}{row['name'][:39]:<40}{row['count']:>7}{row['total']:>10.2f}"
+          f"{row['mean']:>9.2f}{row['max']:>9.2f}{row['share'] * 100:>7.1f}%")
+    tokens = summary["tokens"]
+    lines.append("-" * 99)
+    lines.append(
+        f"wall time {summary['wall_time']:.2f}s, {tokens['prompt_tokens']} prompt tokens, "
+        f"{tokens['completion_tokens']} completion tokens"
+        + (f", {tokens['tokens_per_second']} tokens/s" if tokens["tokens_per_second"] else ""))
+    return "\n".join(lines)
+
+  def write(self, directory=TRACE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+    path = os.path.join(directory, f"{self.name}-{stamp}-{os.getpid()}-{id(self):x}.json")
+    with open(path, "w") as f:
+      json.dump({
+          "name": self.name,
+          "started_at": self.started_at,
+          "summary": self.summary(),
+          "spans": self.spans,
+      }, f, indent=2, default=str)
+    return path
+
+
+class LLMSpanHandler(BaseCallbackHandler):
+  """Records one span per LLM call, with Ollama's token counts and speed."""
+
+  def __init__(self, tracer, name, parent):
+    self.tracer = tracer
+    self.name = name
+    self.parent = parent
+    self._spans = {}
+
+  def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+    self._spans[run_id] = self.tracer.start_span(
+        "llm", self.name, self.parent(), prompt_chars=sum(len(prompt) for prompt in prompts))
+
+  def on_llm_end(self, response, *, run_id, **kwargs):
+    generation = response.generations[0][0] if response.generations and response.generations[0] else None
+    info = (generation.generation_info if generation else None) or {}
+    attributes = {
+        "prompt_tokens": info.get("prompt_eval_count"),
+        "completion_tokens": info.get("eval_count"),
+        "completion_chars": len(generation.text) if generation else 0,
+    }
+    if info.get("eval_count") and info.get("eval_duration"):
+      attributes["generation_seconds"] = info["eval_duration"] / 1e9
+      attributes["tokens_per_second"] = round(info["eval_count"] / attributes["generation_seconds"], 1)
+    self.tracer.end_span(self._spans.pop(run_id, None), **attributes)
+
+  def on_llm_error(self, error, *, run_id, **kwargs):
+    self.tracer.end_span(self._spans.pop(run_id, None), error=f"{type(error).__name__}: {error}")
+
+
+def current():
+  return getattr(_context, "tracer", None), getattr(_context, "span", None)
+
+
+@contextmanager
+def span(kind, name, **attributes):
+  """Record a span under the current one; does nothing outside a traced run."""
+  tracer, parent = current()
+  if tracer is None:
+    yield None
+    return
+  with tracer.span(kind, name, parent, **attributes) as recorded:
+    yield recorded
+
+
+def bind(func):
+  """Carry the current tracing context into a function run on another thread."""
+  tracer, parent = current()
+
+  def bound(*args, **kwargs):
+    previous = current()
+    _context.tracer, _context.span = tracer, parent
+    try:
+      return func(*args, **kwargs)
+    finally:
+      _context.tracer, _context.span = previous
+
+  return bound
+
+
+def llm_callbacks(name):
+  """Callbacks that trace an LLM call made inside a tool under the current span."""
+  tracer, parent = current()
+  if tracer is None:
+    return []
+  return [LLMSpanHandler(tracer, name, lambda: parent)]
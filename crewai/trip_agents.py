@@ -8,24 +8,45 @@ from tools.search_tools import SearchTools
 
 class TripAgents():
 
-  def __init__(self, llm):
+  def __init__(self, llm, verbose=True, tracer=None):
     self.llm = llm
+    self.verbose = verbose
+    self.tracer = tracer
 
-  def city_selection_agent(self):
+  def _with_callbacks(self, callbacks):
+    """Return a copy of the LLM that reports to callbacks."""
+    # copy() would drop the fields excluded from serialization (tags, metadata,
+    # cache), and the first call would fail on them
+    fields = {name: getattr(self.llm, name) for name in self.llm.__fields__}
+    return self.llm.__class__(**{**fields, "callbacks": callbacks})
+
+  def _agent(self, role, tools, **kwargs):
+    if self.tracer is None:
+      return Agent(role=role, tools=tools, llm=self.llm, verbose=self.verbose, **kwargs)
+    # Every traced agent gets its own LLM callbacks, tool wrappers and step callback
+    name = self.tracer.register_agent(role)
     return Agent(
+        role=role,
+        tools=[self.tracer.traced_tool(name, tool) for tool in tools],
+        llm=self._with_callbacks(self.tracer.llm_callbacks(name)),
+        step_callback=self.tracer.step_callback(name),
+        verbose=self.verbose,
+        **kwargs)
+
+  def city_selection_agent(self):
+    return self._agent(
         role='City Selection Expert',
         goal='Select the best city based on weather, season, and prices',
         backstory=
         'An expert in analyzing travel data to pick ideal destinations',
         tools=[
             SearchTools.search_internet,
+            SearchTools.search_internet_batch,
             BrowserTools.scrape_and_summarize_website,
-        ],
-        llm=self.llm,
-        verbose=True)
+        ])
 
   def local_expert(self):
-    return Agent(
+    return self._agent(
         role='Local Expert at this city',
         goal='Provide the BEST insights about the selected city',
         backstory="""A knowledgeable local guide with extensive information
@@ -33,12 +54,10 @@ class TripAgents():
         tools=[
             SearchTools.search_internet,
             BrowserTools.scrape_and_summarize_website,
-        ],
-        llm=self.llm,
-        verbose=True)
+        ])
 
   def travel_concierge(self):
-    return Agent(
+    return self._agent(
         role='Amazing Travel Concierge',
         goal="""Create the most amazing travel itineraries with budget and 
         packing suggestions for the city""",
@@ -48,6 +67,4 @@ class TripAgents():
             SearchTools.search_internet,
             BrowserTools.scrape_and_summarize_website,
             CalculatorTools.calculate,
-        ],
-        llm=self.llm,
-        verbose=True)
\ No newline at end of file
+        ])
\ No newline at end of file
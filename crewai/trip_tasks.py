@@ -4,7 +4,31 @@ from datetime import date
 
 class TripTasks:
 
-    def identify_task(self, agent, origin, cities, interests, range):
+    def research_city_task(self, agent, origin, city, interests, range):
+        return Task(
+            description=dedent(f"""
+                Research {city} as a destination for this trip. Find out
+                the weather forecast for the trip dates, upcoming cultural
+                or seasonal events, the actual flight costs from the
+                origin, and the attractions that match the traveler's
+                interests.
+                
+                Your final answer must be a concise report on {city}
+                only, with facts and numbers that make it easy to compare
+                with other cities.
+                {self.__tip_section()}
+
+                Traveling from: {origin}
+                City: {city}
+                Trip Date: {range}
+                Traveler Interests: {interests}
+            """),
+            agent=agent,
+            async_execution=True,
+            expected_output=f"Report on {city} including flight costs, weather forecast, seasonal events, and attractions"
+        )
+
+    def identify_task(self, agent, origin, cities, interests, range, research_tasks=None):
         return Task(
             description=dedent(f"""
                 Analyze and select the best city for the trip based 
@@ -13,7 +37,7 @@ class TripTasks:
                 multiple cities, considering factors like current weather
                 conditions, upcoming cultural or seasonal events, and
                 overall travel expenses. 
-                
+                {self.__research_section(research_tasks)}
                 Your final answer must be a detailed
                 report on the chosen city, and everything you found out
                 about it, including the actual flight costs, weather 
@@ -26,6 +50,7 @@ class TripTasks:
                 Traveler Interests: {interests}
             """),
             agent=agent,
+            context=research_tasks,
             expected_output="Detailed report on the chosen city including flight costs, weather forecast, and attractions"
         )
 
@@ -79,6 +104,9 @@ class TripTasks:
                 TRIP EVER. Be specific and give it a reason why you picked
                 each place, what makes them special! {self.__tip_section()}
 
+                Compute the whole budget breakdown with a single calculation,
+                giving one named line item, subtotal or conversion per line.
+
                 Trip Date: {range}
                 Traveling from: {origin}
                 Traveler Interests: {interests}
@@ -87,5 +115,14 @@ class TripTasks:
             expected_output="Complete expanded travel plan with daily schedule, weather conditions, packing suggestions, and budget breakdown"
         )
 
+    def __research_section(self, research_tasks):
+        if not research_tasks:
+            return ""
+        return """
+                A research report on every city option is provided as
+                context. Compare the reports and only search again to
+                fill a gap that matters for the decision.
+        """
+
     def __tip_section(self):
         return "If you do your BEST WORK, I'll tip you $100!"
\ No newline at end of file
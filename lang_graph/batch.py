@@ -0,0 +1,284 @@
+"""Run the conversation graph over many prompts from a JSONL file.
+
+Each input line holds one prompt and an optional id:
+
+    {"id": "story-1", "prompt": "Tell me a short story about a brave adventurer."}
+
+Conversations run concurrently on one event loop with the async graph.
+Finished conversations are appended to the output JSONL as soon as they
+complete; rerunning the same command skips every prompt already done, so a
+crashed run resumes where it stopped. Lines without a usable prompt get an
+error record and the batch goes on; repeated ids run once.
+
+By default the number of concurrent conversations is tuned while the batch
+runs: it doubles as long as tokens per second keep improving, then settles
+on the best level seen.
+
+    python batch.py prompts.jsonl stories.jsonl --concurrency 4 --max-concurrency 64
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from langchain_core.messages import HumanMessage
+
+import langgraph_ollama_demo as demo
+
+
+def item_id(item: dict) -> str:
+    """Use the item's own id, or derive a stable one from its prompt."""
+    if item.get("id") is not None:
+        return str(item["id"])
+    return hashlib.sha256(item["prompt"].encode("utf-8")).hexdigest()[:16]
+
+
+def read_prompts(path: str):
+    """Yield (item, error) per non-empty line; error describes a line that cannot be run."""
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": f"line-{line_number}"}, f"{path}:{line_number} is not valid JSON: {e}"
+                continue
+            if not isinstance(item, dict):
+                yield {"id": f"line-{line_number}"}, f"{path}:{line_number} is not a JSON object"
+                continue
+            if not isinstance(item.get("prompt"), str):
+                if item.get("id") is None:
+                    item = {**item, "id": f"line-{line_number}"}
+                yield item, f"{path}:{line_number} has no prompt"
+                continue
+            yield item, None
+
+
+def completed_ids(path: str) -> set:
+    """Ids a previous run finished: completed successfully, or rejected as invalid input."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line behind
+                continue
+            if record.get("status") == "ok" or record.get("input_error"):
+                done.add(record["id"])
+    return done
+
+
+class ConcurrencyTuner:
+    """
+    Hill-climbs the number of concurrent conversations on tokens per second.
+
+    Throughput is measured over windows of finished conversations. A window
+    opens only once the current limit is saturated, so the ramp-up from the
+    previous limit is not counted against the new one. The limit doubles
+    while a window beats the best one by more than `min_gain`; after the first
+    window that does not, one more doubling is probed, and if that one does
+    not improve either the limit settles on the best one seen.
+    """
+
+    def __init__(
+        self,
+        start: int = 4,
+        maximum: int = 64,
+        min_gain: float = 0.05,
+        autotune: bool = True,
+        min_window: int = 4,
+    ):
+        self.limit = start
+        self.maximum = maximum
+        self.min_gain = min_gain
+        self.min_window = min_window
+        self.settled = not autotune
+        self.best = (0.0, start)
+        self._probed = False
+        self._window_start = None
+        self._window_tokens = 0
+        self._window_done = 0
+
+    def observe(self, in_flight: int) -> None:
+        """
+        Open the measurement window once the current limit is reached.
+
+        Args:
+            in_flight (int): Conversations currently running
+        """
+        if not self.settled and self._window_start is None and in_flight >= self.limit:
+            self._window_start = time.perf_counter()
+            self._window_tokens = self._window_done = 0
+
+    def record(self, tokens: int) -> None:
+        """
+        Account for one finished conversation and adjust the limit.
+
+        Args:
+            tokens (int): Tokens generated by the conversation
+        """
+        if self.settled or self._window_start is None:
+            return
+        self._window_tokens += tokens
+        self._window_done += 1
+        # A window lasts one round of conversations at the current limit
+        if self._window_done < max(self.limit, self.min_window):
+            return
+        throughput = self._window_tokens / (time.perf_counter() - self._window_start)
+        self._window_start = None
+        best_throughput, best_limit = self.best
+        if throughput > best_throughput * (1 + self.min_gain):
+            self.best = (throughput, self.limit)
+            self._probed = False
+        elif self._probed:
+            # Two doublings past the best without a gain: that was the peak
+            self.limit = best_limit
+            self.settled = True
+            return
+        else:
+            # Probe one step further before taking a dip for the peak
+            self._probed = True
+        if self.limit >= self.maximum:
+            self.limit = self.best[1]
+            self.settled = True
+        else:
+            self.limit = min(self.limit * 2, self.maximum)
+
+
+async def run_conversation(app, item: dict) -> dict:
+    start = time.perf_counter()
+    record = {"id": item_id(item), "prompt": item["prompt"]}
+    try:
+        state = await app.ainvoke({"messages": [HumanMessage(content=item["prompt"])]})
+        record.update(
+            status="ok",
+            messages=[
+                {"role": "human" if isinstance(msg, HumanMessage) else "ai", "content": msg.content}
+                for msg in state["messages"]
+            ],
+            completion_tokens=state.get("completion_tokens", 0),
+        )
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}", completion_tokens=0)
+    record["latency"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 4,
+    max_concurrency: int = 64,
+    autotune: bool = True,
+    progress_every: int = 10,
+) -> dict:
+    """
+    Run every pending prompt of input_path and return throughput statistics.
+
+    Args:
+        input_path (str): JSONL file with one prompt per line
+        output_path (str): JSONL file the conversations are appended to
+        concurrency (int): Initial (or, without autotune, fixed) concurrency
+        max_concurrency (int): Upper bound for the tuned concurrency
+        autotune (bool): Tune the concurrency for tokens per second
+        progress_every (int): Print progress every this many conversations
+
+    Returns:
+        dict: Counts, wall time, prompts and tokens per second and the final concurrency
+    """
+    app = demo.create_conversation_graph(asynchronous=True)
+    done = completed_ids(output_path)
+    prompts = read_prompts(input_path)
+    seen = set(done)
+    tuner = ConcurrencyTuner(concurrency, max_concurrency, autotune=autotune)
+    completed = failed = tokens = duplicates = 0
+    start = time.perf_counter()
+
+    with open(output_path, "a") as output:
+
+        def finish(record: dict) -> None:
+            nonlocal completed, failed, tokens
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            os.fsync(output.fileno())
+            if record["status"] == "ok":
+                completed += 1
+            else:
+                failed += 1
+            tokens += record["completion_tokens"]
+            total = completed + failed
+            if total % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{total} done ({failed} failed), {total / elapsed:.2f} prompts/s, "
+                      f"{tokens / elapsed:.1f} tokens/s, concurrency {tuner.limit}")
+
+        in_flight = set()
+        exhausted = False
+        while in_flight or not exhausted:
+            # Keep as many conversations running as the tuner allows
+            while not exhausted and len(in_flight) < tuner.limit:
+                entry = next(prompts, None)
+                if entry is None:
+                    exhausted = True
+                    continue
+                item, error = entry
+                conversation_id = item_id(item)
+                if conversation_id in seen:
+                    # Done by a previous run, or repeated earlier in this input
+                    if conversation_id not in done:
+                        duplicates += 1
+                    continue
+                seen.add(conversation_id)
+                if error is not None:
+                    finish({"id": conversation_id, "status": "error", "error": error, "input_error": True,
+                            "completion_tokens": 0, "latency": 0.0})
+                else:
+                    in_flight.add(asyncio.ensure_future(run_conversation(app, item)))
+            tuner.observe(len(in_flight))
+            if not in_flight:
+                continue
+            finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                finish(record)
+                tuner.record(record["completion_tokens"])
+
+    elapsed = time.perf_counter() - start
+    return {
+        "skipped": len(done),
+        "duplicates": duplicates,
+        "completed": completed,
+        "failed": failed,
+        "wall_time": round(elapsed, 1),
+        "prompts_per_second": round((completed + failed) / elapsed, 2) if elapsed else 0.0,
+        "tokens_per_second": round(tokens / elapsed, 1) if elapsed else 0.0,
+        "concurrency": tuner.limit,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the conversation graph over prompts from a JSONL file")
+    parser.add_argument("input", help="JSONL file with a prompt and an optional id per line")
+    parser.add_argument("output", help="JSONL file the conversations are appended to; also used to resume")
+    parser.add_argument("--concurrency", type=int, default=4, help="initial number of concurrent conversations")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="upper bound for the tuned concurrency")
+    parser.add_argument("--no-autotune", action="store_true", help="keep the concurrency fixed")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_batch(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        max_concurrency=args.max_concurrency,
+        autotune=not args.no_autotune,
+    ))
+    print("\n## Batch summary")
+    for key, value in stats.items():
+        print(f"{key:>20}: {value}")
@@ -0,0 +1,56 @@
+"""
+Throughput of the batch runner against a local Ollama stand-in.
+
+The stand-in serves --parallel generations at a time, like a server started
+with OLLAMA_NUM_PARALLEL. Runs the same prompts one at a time, at fixed
+concurrency levels and with auto-tuned concurrency.
+
+Run from the lang_graph directory:
+
+    python -m benchmarks.bench_batch [--prompts 256] [--parallel 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from benchmarks.standins import OllamaStandIn
+
+STORY = "Once upon a time a brave adventurer crossed the mountains and found a hidden valley full of light."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the batch conversation runner")
+    parser.add_argument("--prompts", type=int, default=256, help="prompts per run")
+    parser.add_argument("--parallel", type=int, default=8, help="generations the stand-in serves at once")
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in prefill seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="stand-in seconds between tokens")
+    args = parser.parse_args()
+
+    with OllamaStandIn(reply=STORY, latency=args.latency, token_latency=args.token_latency,
+                       parallel=args.parallel) as ollama, tempfile.TemporaryDirectory() as workdir:
+        os.environ["OLLAMA_BASE_URL"] = ollama.base_url
+        os.environ["LLM_CACHE_MODE"] = "passthrough"
+        from batch import run_batch
+
+        prompts = os.path.join(workdir, "prompts.jsonl")
+        with open(prompts, "w") as f:
+            for i in range(args.prompts):
+                f.write(json.dumps({"id": f"story-{i}", "prompt": f"Tell me story number {i}."}) + "\n")
+
+        print(f"{args.prompts} prompts, stand-in serving {args.parallel} generations at once\n")
+        print(f"{'':<22}{'prompts/s':>12}{'tokens/s':>12}{'concurrency':>14}")
+        runs = [(f"fixed {n}", n, False) for n in (1, 4, 16, 64)] + [
+        (f"auto-tuned from {n}", n, True) for n in (1, 4)]
+        for i, (label, concurrency, autotune) in enumerate(runs):
+            stats = asyncio.run(run_batch(
+                prompts, os.path.join(workdir, f"out-{i}.jsonl"),
+                concurrency=concurrency, autotune=autotune, progress_every=args.prompts + 1,
+            ))
+            print(f"{label:<22}{stats['prompts_per_second']:>12.2f}{stats['tokens_per_second']:>12.1f}"
+                  f"{stats['concurrency']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cost of checkpointing the conversation graph, and resuming after a crash.
+
+Runs long synthetic conversations with an instant fake LLM and no
+checkpointer, LangGraph's in-memory saver, and the SQLite delta saver, then
+crashes a conversation halfway and resumes it from its checkpoints.
+
+Run from the lang_graph directory:
+
+    python -m benchmarks.bench_checkpoint [--turns 500]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, List, Optional
+
+os.environ["LLM_CACHE_MODE"] = "passthrough"
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+import langgraph_ollama_demo as demo
+from sqlite_checkpoint import SQLiteDeltaSaver
+
+# Calls made to the fake LLM, and the call that raises to simulate a crash
+CALLS = {"count": 0, "crash_at": None}
+
+
+class InstantLLM(LLM):
+    """Answers instantly; raises once on the call numbered CALLS["crash_at"]."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "instant"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        CALLS["count"] += 1
+        if CALLS["count"] == CALLS["crash_at"]:
+            raise RuntimeError("simulated crash")
+        return f"Chapter {CALLS['count']}: the brave adventurer went on."
+
+
+class TimedSaver(SQLiteDeltaSaver):
+    """Records how long every checkpoint write takes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.put_times = []
+
+    def put(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().put(*args, **kwargs)
+        finally:
+            self.put_times.append(time.perf_counter() - start)
+
+
+def conversation(turns, checkpointer, thread_id):
+    app = demo.create_conversation_graph(max_messages=turns + 1, checkpointer=checkpointer)
+    config = {"configurable": {"thread_id": thread_id}, "recursion_limit": turns + 10}
+    start = time.perf_counter()
+    app.invoke({"messages": [HumanMessage(content="Tell me a long story.")]}, config)
+    return (time.perf_counter() - start) / turns * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpointing cost and crash recovery")
+    parser.add_argument("--turns", type=int, default=500, help="AI turns per conversation")
+    args = parser.parse_args()
+    demo.llm = InstantLLM()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "checkpoints.sqlite3")
+        saver = TimedSaver(path)
+
+        print(f"{args.turns} turns per conversation\n")
+        print(f"{'checkpointer':<22}{'ms per turn':>14}")
+        for label, checkpointer in (("none", None), ("in-memory", MemorySaver()), ("sqlite delta", saver)):
+            print(f"{label:<22}{conversation(args.turns, checkpointer, label):>14.3f}")
+
+        tenth = max(1, len(saver.put_times) // 10)
+        first = [t * 1000 for t in saver.put_times[:tenth]]
+        last = [t * 1000 for t in saver.put_times[-tenth:]]
+        print(f"\nsqlite checkpoint write: {statistics.mean(first):.3f} ms mean over the first tenth, "
+              f"{statistics.mean(last):.3f} ms over the last, "
+              f"p99 {sorted(saver.put_times)[int(len(saver.put_times) * 0.99)] * 1000:.3f} ms")
+        print(f"database size after {args.turns} turns: {saver.size() / 1024:.0f} KiB "
+              f"(keeping {saver.keep} checkpoints per thread)")
+
+        # Crash halfway through a conversation, then resume it in a new saver
+        CALLS["count"], CALLS["crash_at"] = 0, args.turns // 2
+        config = {"configurable": {"thread_id": "crash"}, "recursion_limit": args.turns + 10}
+        app = demo.create_conversation_graph(max_messages=args.turns + 1, checkpointer=saver)
+        try:
+            app.invoke({"messages": [HumanMessage(content="Tell me a long story.")]}, config)
+        except RuntimeError:
+            pass
+        saver.close()
+
+        saver = SQLiteDeltaSaver(path)
+        app = demo.create_conversation_graph(max_messages=args.turns + 1, checkpointer=saver)
+        resumed_at = len(app.get_state(config).values["messages"])
+        final_state = app.invoke(None, config)
+        print(f"\ncrashed at turn {args.turns // 2}, resumed with {resumed_at} messages, "
+              f"finished with {len(final_state['messages'])}; "
+              f"{CALLS['count'] - 1} LLM calls for {args.turns} turns")
+        saver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cost of long conversations: copied message lists versus the append-only log.
+
+Runs 1,000-turn synthetic conversations through the legacy graph (pydantic
+state, `state.messages + [new]` on every step) and through the conversation
+graph with its append-only reducer, using an instant fake LLM so only graph
+overhead is measured. Both stay flat per turn at these sizes; copying a
+list of message references is not where long conversations get expensive.
+Also reports how large the prompts get with the bounded-window and
+summarized views.
+
+Run from the lang_graph directory:
+
+    python -m benchmarks.bench_long_conversation [--turns 1000]
+"""
+import argparse
+import os
+import time
+from typing import Any, List, Optional
+
+os.environ["LLM_CACHE_MODE"] = "passthrough"
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.pydantic_v1 import BaseModel
+from langgraph.graph import END, StateGraph
+
+import langgraph_ollama_demo as demo
+
+
+# Size and time of every prompt; kept outside the LLM so they are not part
+# of its serialized parameters
+PROMPT_CHARS: List[int] = []
+CALL_TIMES: List[float] = []
+
+
+class EchoLLM(LLM):
+    """Answers instantly and records the size and time of every prompt."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        PROMPT_CHARS.append(len(prompt))
+        CALL_TIMES.append(time.perf_counter())
+        return "Once upon a time a brave adventurer crossed the mountains and found a hidden valley."
+
+
+class LegacyState(BaseModel):
+    messages: list = []
+
+
+def legacy_graph(llm, max_messages):
+    """The graph as it was before the append-only reducer."""
+    def generate(state: LegacyState):
+        response = llm.invoke(state.messages[-1].content)
+        return {"messages": state.messages + [AIMessage(content=response)]}
+
+    def route(state: LegacyState):
+        return END if len(state.messages) >= max_messages else "generate"
+
+    workflow = StateGraph(LegacyState)
+    workflow.add_node("generate", generate)
+    workflow.set_entry_point("generate")
+    workflow.add_conditional_edges("generate", route, {END: END, "generate": "generate"})
+    return workflow.compile()
+
+
+def run(label, graph, initial_state, turns):
+    PROMPT_CHARS.clear()
+    CALL_TIMES.clear()
+    start = time.perf_counter()
+    final_state = graph.invoke(initial_state, {"recursion_limit": turns + 10})
+    elapsed = time.perf_counter() - start
+    messages = final_state["messages"]
+    # Step time over the first and the last tenth of the conversation
+    times, tenth = CALL_TIMES, max(1, turns // 10)
+    first_ms = (times[tenth] - times[0]) / tenth * 1000
+    last_ms = (times[-1] - times[-1 - tenth]) / tenth * 1000
+    print(f"{label:<34}{len(messages):>10}{elapsed:>10.2f}{first_ms:>12.3f}{last_ms:>12.3f}"
+          f"{max(PROMPT_CHARS):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graph overhead of long conversations")
+    parser.add_argument("--turns", type=int, default=1000, help="AI turns per conversation")
+    args = parser.parse_args()
+
+    llm = EchoLLM()
+    demo.llm = llm
+    max_messages = args.turns + 1
+    first = HumanMessage(content="Tell me a short story about a brave adventurer.")
+
+    print(f"{args.turns} turns per conversation\n")
+    print(f"{'':<34}{'messages':>10}{'wall (s)':>10}{'ms/turn':>12}{'ms/turn':>12}{'max prompt':>12}")
+    print(f"{'':<34}{'':>10}{'':>10}{'first 10%':>12}{'last 10%':>12}{'(chars)':>12}")
+    run("legacy (copy + validate)", legacy_graph(llm, max_messages),
+        LegacyState(messages=[first]), args.turns)
+
+    graph = demo.create_conversation_graph(max_messages=max_messages)
+    for label, window, summarize in (
+        ("append-only, last message", 1, False),
+        ("append-only, window of 8", 8, False),
+        ("append-only, window 8 + summary", 8, True),
+        ("append-only, full history", max_messages, False),
+    ):
+        demo.MODEL_WINDOW, demo.SUMMARIZE_HISTORY = window, summarize
+        run(label, graph, {"messages": [first]}, args.turns)
+
+
+if __name__ == "__main__":
+    main()
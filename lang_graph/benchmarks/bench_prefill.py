@@ -0,0 +1,69 @@
+"""
+Prefill time per turn of a long conversation against a local Ollama stand-in.
+
+The stand-in spends prefill time on every prompt word it has not seen yet;
+context tokens passed back from an earlier call are free, as with Ollama's
+prompt cache. Compares sending only the last message (no memory), resending
+the full transcript, and continuing from Ollama's returned context.
+
+Run from the lang_graph directory:
+
+    python -m benchmarks.bench_prefill [--turns 40]
+"""
+import argparse
+import os
+import statistics
+
+from benchmarks.standins import OllamaStandIn
+
+PROMPT = "Tell me a long story about a brave adventurer."
+STORY = "The brave adventurer crossed the mountains, followed the river through the forest and found a hidden valley."
+
+
+def conversation(demo, turns):
+    app = demo.create_conversation_graph(max_messages=turns + 1)
+    state = app.invoke({"messages": [demo.HumanMessage(content=PROMPT)]}, {"recursion_limit": turns + 10})
+    stats = [msg.response_metadata for msg in state["messages"] if isinstance(msg, demo.AIMessage)]
+    prefill_ms = [s["prompt_eval_duration"] / 1e6 for s in stats]
+    prompt_tokens = [s["prompt_eval_count"] for s in stats]
+    # Tokens of the conversation the model sees on the last turn: the context
+    # it continued from and the prompt, or the prompt alone
+    context = state.get("context")
+    seen = len(context) - stats[-1]["eval_count"] if context else prompt_tokens[-1]
+    return prefill_ms, prompt_tokens, seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefill time per turn of a long conversation")
+    parser.add_argument("--turns", type=int, default=40, help="AI turns per conversation")
+    parser.add_argument("--latency", type=float, default=0.005, help="stand-in fixed prefill seconds per call")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0002,
+                        help="stand-in prefill seconds per uncached prompt word")
+    args = parser.parse_args()
+
+    with OllamaStandIn(reply=STORY, latency=args.latency,
+                       prompt_token_latency=args.prompt_token_latency) as ollama:
+        os.environ["OLLAMA_BASE_URL"] = ollama.base_url
+        os.environ["LLM_CACHE_MODE"] = "passthrough"
+        import langgraph_ollama_demo as demo
+
+        tenth = max(1, args.turns // 10)
+        print(f"{args.turns} turns per conversation\n")
+        print(f"{'':<22}{'prefill ms':>12}{'prefill ms':>12}{'prompt tokens':>15}{'prompt tokens':>15}"
+              f"{'history seen':>14}")
+        print(f"{'':<22}{'first 10%':>12}{'last 10%':>12}{'first turn':>15}{'last turn':>15}"
+              f"{'(tokens)':>14}")
+        for label, window, reuse in (
+            ("last message only", 1, False),
+            ("full transcript", args.turns + 1, False),
+            ("context reuse", 1, True),
+        ):
+            demo.MODEL_WINDOW, demo.REUSE_CONTEXT = window, reuse
+            prefill_ms, prompt_tokens, seen = conversation(demo, args.turns)
+            print(f"{label:<22}{statistics.mean(prefill_ms[:tenth]):>12.1f}"
+                  f"{statistics.mean(prefill_ms[-tenth:]):>12.1f}"
+                  f"{prompt_tokens[0]:>15}{prompt_tokens[-1]:>15}{seen:>14}")
+
+
+if __name__ == "__main__":
+    main()
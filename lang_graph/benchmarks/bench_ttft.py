@@ -0,0 +1,93 @@
+"""
+Time to first token of the conversation graph against a local Ollama stand-in.
+
+Compares the blocking `invoke` (nothing is shown until the conversation is
+over) with token streaming, then drives many conversations concurrently
+with `astream` on a single event loop.
+
+Run from the lang_graph directory:
+
+    python -m benchmarks.bench_ttft [--concurrency 32]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.standins import OllamaStandIn
+
+PROMPT = "Tell me a short story about a brave adventurer."
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def blocking(demo):
+    app = demo.create_conversation_graph()
+    start = time.perf_counter()
+    app.invoke({"messages": [demo.HumanMessage(content=PROMPT)]})
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, elapsed
+
+
+def streaming(demo):
+    app = demo.create_conversation_graph()
+    start = time.perf_counter()
+    first_token = first_message = None
+    for mode, _ in app.stream({"messages": [demo.HumanMessage(content=PROMPT)]},
+                              stream_mode=["custom", "updates"]):
+        now = time.perf_counter() - start
+        if mode == "custom" and first_token is None:
+            first_token = now
+        elif mode == "updates" and first_message is None:
+            first_message = now
+    return first_token, first_message, time.perf_counter() - start
+
+
+async def concurrent(demo, conversations):
+    app = demo.create_conversation_graph(asynchronous=True)
+
+    async def conversation():
+        start = time.perf_counter()
+        first_token = None
+        async for _ in app.astream({"messages": [demo.HumanMessage(content=PROMPT)]}, stream_mode="custom"):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+        return first_token, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(conversation() for _ in range(conversations)))
+    return [ttft for ttft, _ in results], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first token of the conversation graph")
+    parser.add_argument("--latency", type=float, default=0.3, help="stand-in prefill seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="stand-in seconds between tokens")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent async conversations")
+    args = parser.parse_args()
+
+    with OllamaStandIn(latency=args.latency, token_latency=args.token_latency) as ollama:
+        os.environ["OLLAMA_BASE_URL"] = ollama.base_url
+        os.environ["LLM_CACHE_MODE"] = "passthrough"
+        import langgraph_ollama_demo as demo
+
+        print(f"Stand-in: {args.latency}s prefill, {args.token_latency}s per token, "
+              f"{demo.MAX_MESSAGES - 1} generations per conversation\n")
+        print(f"{'':<22}{'first token (s)':>18}{'first message (s)':>20}{'total (s)':>12}")
+        for label, run in (("invoke (blocking)", blocking), ("stream (tokens)", streaming)):
+            first_token, first_message, total = run(demo)
+            print(f"{label:<22}{first_token:>18.3f}{first_message:>20.3f}{total:>12.3f}")
+
+        single = streaming(demo)[2]
+        ttfts, wall = asyncio.run(concurrent(demo, args.concurrency))
+        print(f"\n{args.concurrency} concurrent conversations on one event loop (astream):")
+        print(f"  first token p50 {statistics.median(ttfts):.3f}s, p95 {percentile(ttfts, 0.95):.3f}s")
+        print(f"  wall time {wall:.2f}s vs {single * args.concurrency:.2f}s one after another")
+
+
+if __name__ == "__main__":
+    main()
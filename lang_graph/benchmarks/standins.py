@@ -0,0 +1,123 @@
+"""Local Ollama stand-in for the conversation graph benchmarks.
+
+    with OllamaStandIn(latency=0.5, token_latency=0.02) as ollama:
+        os.environ["OLLAMA_BASE_URL"] = ollama.base_url
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer:
+    """Base class: subclasses implement handle(path, body) -> (status, content_type, body)."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        standin = self
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with standin._lock:
+                    standin.requests += 1
+                status, content_type, payload = standin.handle(self.path, body)
+                if isinstance(payload, (bytes, str)):
+                    payload = payload.encode() if isinstance(payload, str) else payload
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                # Iterables of lines are streamed with chunked transfer encoding
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for line in payload:
+                    data = line.encode()
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+
+    def handle(self, path, body):
+        raise NotImplementedError
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class OllamaStandIn(StandInServer):
+    """Answers /api/generate with a streamed reply after a fixed latency.
+
+    `reply` is either a string or a callable taking the prompt. The latency is
+    spent before the first token (prefill) and `token_latency` between tokens.
+    `prompt_token_latency` adds prefill time per word of the prompt; like
+    Ollama's prompt cache, tokens passed back as `context` cost nothing.
+    Like Ollama's OLLAMA_NUM_PARALLEL, `parallel` bounds how many requests are
+    generated at once; the others wait in a queue.
+    """
+
+    def __init__(self, reply="Once upon a time a brave adventurer crossed the mountains.", latency=0.5,
+                 token_latency=0.0, prompt_token_latency=0.0, parallel=None, **kwargs):
+        super().__init__(**kwargs)
+        self.reply = reply
+        self.latency = latency
+        self.token_latency = token_latency
+        self.prompt_token_latency = prompt_token_latency
+        self._slots = threading.Semaphore(parallel) if parallel else None
+
+    def handle(self, path, body):
+        request = json.loads(body or b"{}")
+        prompt = request.get("prompt", "")
+        reply = self.reply(prompt) if callable(self.reply) else self.reply
+        return 200, "application/x-ndjson", self._stream(request, prompt, reply)
+
+    def _stream(self, request, prompt, reply):
+        if self._slots is None:
+            yield from self._generate(request, prompt, reply)
+            return
+        with self._slots:
+            yield from self._generate(request, prompt, reply)
+
+    def _generate(self, request, prompt, reply):
+        start = time.perf_counter()
+        time.sleep(self.latency + self.prompt_token_latency * len(prompt.split()))
+        prompt_eval = time.perf_counter() - start
+        tokens = reply.split(" ")
+        for i, token in enumerate(tokens):
+            if i and self.token_latency:
+                time.sleep(self.token_latency)
+            text = token if i == 0 else " " + token
+            yield json.dumps({"model": request.get("model"), "response": text, "done": False}) + "\n"
+        total = time.perf_counter() - start
+        yield json.dumps({
+            "model": request.get("model"),
+            "response": "",
+            "done": True,
+            "context": list(request.get("context") or []) + [
+                zlib.crc32(word.encode()) % 32000 for word in prompt.split() + tokens],
+            "prompt_eval_count": len(prompt.split()),
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((total - prompt_eval) * 1e9),
+            "total_duration": int(total * 1e9),
+        }) + "\n"
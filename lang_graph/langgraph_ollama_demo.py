@@ -1,77 +1,382 @@
+import asyncio
+import hashlib
+import json
+import operator
 import os
-from typing import Annotated
+import sys
+import uuid
+from functools import partial
+from typing import Annotated, Any, Dict, List, Mapping, Optional, TypedDict
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.outputs import LLMResult
 from langchain_community.llms import Ollama
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, END
-from langchain_core.pydantic_v1 import BaseModel
+from langgraph.types import StreamWriter
+from llm_cache import configure_llm_cache
+from message_log import MessageLog, append_messages
+from sqlite_checkpoint import SQLiteDeltaSaver
+
+# Number of latest messages sent to the model; 1 sends only the last message
+MODEL_WINDOW = int(os.environ.get("MODEL_WINDOW", "1"))
+# Fold messages that leave the window into a running summary
+SUMMARIZE_HISTORY = os.environ.get("SUMMARIZE_HISTORY", "0") == "1"
+# Messages that must leave the window before they are summarized in one call
+SUMMARY_BATCH = int(os.environ.get("SUMMARY_BATCH", "8"))
+# Continue from the context tokens Ollama returned on the previous turn
+REUSE_CONTEXT = os.environ.get("REUSE_CONTEXT", "1") == "1"
+# Ollama's context window (num_ctx); the context is rebuilt before it fills up
+CONTEXT_LIMIT = int(os.environ.get("CONTEXT_LIMIT", "2048"))
+# Simple logic to end after 3 exchanges
+MAX_MESSAGES = 6
+
+# Prompt of a turn that follows the model's own message
+CONTINUE_PROMPT = "Continue."
+
+SUMMARY_PROMPT = (
+    "Update the summary of a conversation with the new messages below. "
+    "Keep names, facts and open questions, and return only the summary."
+    "\n\nSUMMARY\n----------\n{summary}\n\nNEW MESSAGES\n----------\n{transcript}")
 
 # Define the state of the graph
-class GraphState(BaseModel):
+class GraphState(TypedDict, total=False):
     """
     Represents the state of our conversation graph.
     
     Attributes:
-        messages (list): List of messages in the conversation
+        messages (MessageLog): Append-only log of the messages in the conversation;
+            nodes return only their new messages
+        summary (str): Summary of the messages that left the model window
+        summarized (int): Number of leading messages covered by the summary
+        completion_tokens (int): Tokens generated so far in the conversation
+        context (list): Ollama context tokens returned by the last generation
+        context_messages (int): Number of leading messages covered by the context
     """
-    messages: list = []
+    messages: Annotated[MessageLog, append_messages]
+    summary: str
+    summarized: int
+    completion_tokens: Annotated[int, operator.add]
+    context: List[int]
+    context_messages: int
+
+# Record/replay every LLM call (see LLM_CACHE_MODE)
+configure_llm_cache()
+
+class ContextualOllama(Ollama):
+    """
+    Ollama LLM that continues from the context tokens of an earlier call.
+    
+    Ollama returns the tokens of every prompt and response as `context`.
+    Sending them back with the next prompt continues the same conversation,
+    and the server only prefills the new prompt.
+    """
+
+    context: Optional[List[int]] = None
+    """Context tokens returned by the previous call, or None to start fresh."""
+
+    @property
+    def _default_params(self) -> Dict[str, Any]:
+        params = super()._default_params
+        if self.context:
+            params["context"] = self.context
+        return params
+
+    @property
+    def _identifying_params(self) -> Mapping[str, Any]:
+        # Cached generations are keyed on a digest of the context, not on the tokens
+        params = dict(super()._identifying_params)
+        if self.context:
+            params["context"] = hashlib.sha256(json.dumps(self.context).encode()).hexdigest()
+        return params
+
+    def with_context(self, context: Optional[List[int]]) -> "ContextualOllama":
+        """Return a copy of the model that continues from context."""
+        # copy() would drop the fields excluded from serialization, like callbacks
+        fields = {name: getattr(self, name) for name in self.__fields__}
+        return self.__class__(**{**fields, "context": context})
 
 # Initialize Ollama model
-llm = Ollama(model="llama3.2")
+llm = ContextualOllama(
+    model="llama3.2",
+    base_url=os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434"),
+)
+
+def render_transcript(messages) -> str:
+    """
+    Render messages as a transcript for the model.
+    
+    Args:
+        messages: Messages to render
+    
+    Returns:
+        str: One "Human:" or "AI:" paragraph per message
+    """
+    return "\n\n".join(
+        f"{'Human' if isinstance(msg, HumanMessage) else 'AI'}: {msg.content}" for msg in messages
+    )
+
+def model_view(state: GraphState, window: int = MODEL_WINDOW) -> str:
+    """
+    Build the prompt sent to the model from a bounded view of the conversation.
+    
+    Args:
+        state (GraphState): Current state of the conversation
+        window (int): Number of latest messages to include
+    
+    Returns:
+        str: The last message alone, or the summary and the latest messages
+    """
+    messages = state["messages"]
+    summary = state.get("summary", "")
+    if summary:
+        # Everything after the summarized prefix; bounded by window + SUMMARY_BATCH
+        recent = messages[state.get("summarized", 0):]
+    else:
+        recent = messages[-window:]
+    if len(recent) == 1 and not summary:
+        return recent[0].content
+    prompt = render_transcript(recent) + "\n\nAI:"
+    if summary:
+        prompt = f"Summary of the earlier conversation: {summary}\n\n{prompt}"
+    return prompt
+
+def reusable_context(state: GraphState) -> Optional[list]:
+    """
+    Return the Ollama context to continue from, if there is one.
+    
+    Args:
+        state (GraphState): Current state of the conversation
+    
+    Returns:
+        list: Context tokens of the last generation, or None when context reuse
+            is off or the context is close to filling the model's window
+    """
+    context = state.get("context")
+    if REUSE_CONTEXT and context and len(context) < CONTEXT_LIMIT * 3 // 4:
+        return context
+    return None
+
+def turn_prompt(state: GraphState, context: Optional[list]) -> str:
+    """
+    Build the prompt of a turn.
+    
+    Args:
+        state (GraphState): Current state of the conversation
+        context (list): Context tokens the turn continues from, or None
+    
+    Returns:
+        str: Only the messages the context does not cover yet, or the bounded
+            view of `model_view` when starting without a context
+    """
+    if context is None:
+        return model_view(state, MODEL_WINDOW)
+    new = state["messages"][state.get("context_messages", 0):]
+    if not new:
+        return CONTINUE_PROMPT
+    if len(new) == 1:
+        return new[0].content
+    return render_transcript(new)
+
+def llm_for(context: Optional[list]):
+    """Return the model, bound to the context when there is one."""
+    if context is None or not isinstance(llm, ContextualOllama):
+        return llm
+    return llm.with_context(context)
+
+class TokenStream(BaseCallbackHandler):
+    """
+    Forwards the tokens of an LLM call to the graph's stream writer.
+    
+    Each token is written as {"node": ..., "token": ...} and surfaces in
+    the graph's "custom" stream mode.
+    """
+
+    # Forward tokens on the event loop instead of a thread pool
+    run_inline = True
+
+    def __init__(self, writer: StreamWriter, node: str = "generate"):
+        self.writer = writer
+        self.node = node
+        self.streamed = False
 
-def generate_response(state: GraphState) -> GraphState:
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.streamed = True
+        self.writer({"node": self.node, "token": token})
+
+    def finish(self, text: str) -> None:
+        """Write a response that arrived without tokens, such as a cache hit, in one piece."""
+        if not self.streamed and text:
+            self.writer({"node": self.node, "token": text})
+
+def summary_request(state: GraphState, window: int) -> Optional[tuple]:
     """
-    Generate a response based on the current conversation state.
+    Decide whether messages that left the model window should be summarized.
+    
+    Messages are folded SUMMARY_BATCH at a time, so the cost of a turn does
+    not grow with the length of the conversation.
     
     Args:
         state (GraphState): Current state of the conversation
+        window (int): Number of latest messages kept out of the summary
     
     Returns:
-        GraphState: Updated state with the new AI response
+        tuple: The summarization prompt and the new summarized count, or None
+    """
+    messages = state["messages"]
+    summarized = state.get("summarized", 0)
+    end = len(messages) - window
+    if end - summarized < SUMMARY_BATCH:
+        return None
+    prompt = SUMMARY_PROMPT.format(
+        summary=state.get("summary") or "(empty)",
+        transcript=render_transcript(messages[summarized:end]),
+    )
+    return prompt, end
+
+def summarize_history(state: GraphState, window: int = MODEL_WINDOW) -> dict:
+    """
+    Fold the messages that left the model window into the running summary.
+    
+    Args:
+        state (GraphState): Current state of the conversation
+        window (int): Number of latest messages kept out of the summary
+    
+    Returns:
+        dict: Summary updates, empty when there is not enough to fold yet
+    """
+    request = summary_request(state, window)
+    if request is None:
+        return {}
+    prompt, end = request
+    return {"summary": llm.invoke(prompt), "summarized": end}
+
+async def asummarize_history(state: GraphState, window: int = MODEL_WINDOW) -> dict:
+    """
+    Async version of `summarize_history`.
+    """
+    request = summary_request(state, window)
+    if request is None:
+        return {}
+    prompt, end = request
+    return {"summary": await llm.ainvoke(prompt), "summarized": end}
+
+def response_update(state: GraphState, result: LLMResult, tokens: TokenStream, update: dict) -> dict:
     """
-    # Get the last human message
-    last_message = state.messages[-1]
+    Turn a generation into the node's state update.
     
-    # Generate response from Ollama
-    response = llm.invoke(last_message.content)
+    Args:
+        state (GraphState): State the generation was made from
+        result (LLMResult): Result of the LLM call
+        tokens (TokenStream): Token handler of the call
+        update (dict): Summary updates made by the node
     
-    # Update the state with the new messages
-    return {
-        "messages": state.messages + [AIMessage(content=response)]
+    Returns:
+        dict: The new AI message, appended to the conversation by the reducer,
+            the number of tokens generated and Ollama's new context
+    """
+    generation = result.generations[0][0]
+    tokens.finish(generation.text)
+    info = generation.generation_info or {}
+    # Prefill and decode statistics of the call, when the model reports them
+    metadata = {key: info[key] for key in (
+        "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration") if key in info}
+    # Only the new message; earlier ones are never copied
+    response = {
+        "messages": [AIMessage(content=generation.text, response_metadata=metadata)],
+        "completion_tokens": info.get("eval_count") or len(generation.text.split()),
+        **update,
     }
+    if REUSE_CONTEXT and info.get("context"):
+        response["context"] = info["context"]
+        # Every message so far, plus the new one, is part of the context
+        response["context_messages"] = len(state["messages"]) + 1
+    return response
 
-def route_to_end(state: GraphState) -> str:
+def generate_response(state: GraphState, writer: StreamWriter) -> dict:
+    """
+    Generate a response based on the current conversation state, streaming
+    its tokens to the graph's "custom" stream.
+    
+    Args:
+        state (GraphState): Current state of the conversation
+        writer (StreamWriter): Stream writer injected by LangGraph
+    
+    Returns:
+        dict: The new AI message, its context and any summary updates
+    """
+    context = reusable_context(state)
+    # The summary only matters when the prompt is built without a context
+    update = summarize_history(state, MODEL_WINDOW) if SUMMARIZE_HISTORY and context is None else {}
+    tokens = TokenStream(writer)
+    
+    # Generate response from Ollama; generate() streams the tokens internally
+    prompt = turn_prompt({**state, **update}, context)
+    result = llm_for(context).generate([prompt], callbacks=[tokens])
+    return response_update(state, result, tokens, update)
+
+async def agenerate_response(state: GraphState, writer: StreamWriter) -> dict:
+    """
+    Async version of `generate_response`, so that many conversations can
+    share one event loop.
+    
+    Args:
+        state (GraphState): Current state of the conversation
+        writer (StreamWriter): Stream writer injected by LangGraph
+    
+    Returns:
+        dict: The new AI message, its context and any summary updates
+    """
+    context = reusable_context(state)
+    update = await asummarize_history(state, MODEL_WINDOW) if SUMMARIZE_HISTORY and context is None else {}
+    tokens = TokenStream(writer)
+    prompt = turn_prompt({**state, **update}, context)
+    result = await llm_for(context).agenerate([prompt], callbacks=[tokens])
+    return response_update(state, result, tokens, update)
+
+def route_to_end(state: GraphState, max_messages: int = MAX_MESSAGES) -> str:
     """
     Determine if the conversation should end.
     
     Args:
         state (GraphState): Current state of the conversation
+        max_messages (int): Length at which the conversation ends
     
     Returns:
         str: Next node in the graph or END
     """
-    # Simple logic to end after 3 exchanges
-    if len(state.messages) >= 6:  # 3 human + 3 AI messages
+    if len(state["messages"]) >= max_messages:  # 3 human + 3 AI messages by default
         return END
     return "generate"
 
 # Build the graph
-def create_conversation_graph():
+def create_conversation_graph(
+    max_messages: int = MAX_MESSAGES,
+    asynchronous: bool = False,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+):
     """
     Create and compile the conversation graph.
     
+    Args:
+        max_messages (int): Length at which conversations end
+        asynchronous (bool): Use the async node, for `ainvoke`/`astream`
+        checkpointer (BaseCheckpointSaver): Saves the state after every node,
+            making conversations resumable by thread ID
+    
     Returns:
         Compiled graph ready for execution
     """
     workflow = StateGraph(GraphState)
     
     # Define the nodes
-    workflow.add_node("generate", generate_response)
+    workflow.add_node("generate", agenerate_response if asynchronous else generate_response)
     
     # Define the edges
     workflow.set_entry_point("generate")
     workflow.add_conditional_edges(
         "generate",
-        route_to_end,
+        partial(route_to_end, max_messages=max_messages),
         {
             END: END,
             "generate": "generate"
@@ -79,30 +384,69 @@ def create_conversation_graph():
     )
     
     # Compile the graph
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+async def arun_conversations(prompts: list, max_messages: int = MAX_MESSAGES) -> list:
+    """
+    Run one conversation per prompt concurrently on the current event loop.
+    
+    Args:
+        prompts (list): Opening human message of each conversation
+        max_messages (int): Length at which conversations end
+    
+    Returns:
+        list: The final state of each conversation, in the order of prompts
+    """
+    app = create_conversation_graph(max_messages, asynchronous=True)
+    return await asyncio.gather(*(
+        app.ainvoke({"messages": [HumanMessage(content=prompt)]}) for prompt in prompts
+    ))
 
 def main():
     """
     Main function to run the LangGraph Ollama demo.
+    
+    The conversation is checkpointed under a thread ID: the first command
+    line argument, or a new one for every run. Rerunning with the same ID
+    after a crash resumes it from the last completed node.
     """
-    # Create the graph
-    app = create_conversation_graph()
+    thread_id = sys.argv[1] if len(sys.argv) > 1 else uuid.uuid4().hex[:12]
+    config = {"configurable": {"thread_id": thread_id}}
+    print(f"Thread ID: {thread_id} (rerun with it to resume)")
     
-    # Start the conversation
-    initial_state = GraphState(
-        messages=[HumanMessage(content="Tell me a short story about a brave adventurer.")]
-    )
+    # Create the graph
+    app = create_conversation_graph(checkpointer=SQLiteDeltaSaver())
     
-    # Run the conversation
-    final_state = app.invoke(initial_state)
+    # Start the conversation, or resume an interrupted one
+    saved = app.get_state(config)
+    if saved.values and not saved.next:
+        print(f"Conversation {thread_id!r} is already complete.")
+        for msg in saved.values["messages"]:
+            print(f"{'Human' if isinstance(msg, HumanMessage) else 'AI'}: {msg.content}")
+        return
+    if saved.next:
+        print(f"Resuming conversation {thread_id!r} at message {len(saved.values['messages']) + 1}.")
+        initial_state = None
+    else:
+        initial_state = {
+            "messages": [HumanMessage(content="Tell me a short story about a brave adventurer.")]
+        }
     
-    # Print the conversation
+    # Run the conversation, printing tokens as they are generated
     print("Conversation Log:")
-    for msg in final_state['messages']:
-        if isinstance(msg, HumanMessage):
-            print(f"Human: {msg.content}")
-        elif isinstance(msg, AIMessage):
-            print(f"AI: {msg.content}")
+    for msg in (initial_state or saved.values)["messages"]:
+        print(f"{'Human' if isinstance(msg, HumanMessage) else 'AI'}: {msg.content}")
+    new_message = True
+    for mode, chunk in app.stream(initial_state, config, stream_mode=["custom", "updates"]):
+        if mode == "custom":
+            if new_message:
+                print("AI: ", end="")
+                new_message = False
+            print(chunk["token"], end="", flush=True)
+        else:
+            # A node finished
+            print()
+            new_message = True
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,133 @@
+"""Record/replay cache for LLM calls, stored in a local SQLite database.
+
+Entries are keyed by the model, its parameters and the full prompt, so
+rerunning an unchanged conversation replays instantly and offline benchmark
+runs are deterministic. Modes:
+
+    record       replay cached generations and record new ones (default)
+    replay       only replay; a prompt that is not cached raises CacheMissError
+    passthrough  no caching at all
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain.globals import set_llm_cache
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+MODES = ("record", "replay", "passthrough")
+LLM_CACHE_MODE = os.environ.get("LLM_CACHE_MODE", "record")
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_cache.sqlite3"))
+LLM_CACHE_MAX_MB = int(os.environ.get("LLM_CACHE_MAX_MB", "512"))
+
+
+class CacheMissError(RuntimeError):
+    pass
+
+
+class RecordReplayCache(BaseCache):
+    """
+    A LangChain LLM cache with record and replay-only modes.
+
+    Once the database grows past max_bytes, the least recently used entries
+    are evicted.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, mode="record", max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported cache mode {mode!r}, expected 'record' or 'replay'")
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS generations (
+                key TEXT PRIMARY KEY,
+                llm_string TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL)""")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS generations_last_used ON generations (last_used)")
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._connection.execute("UPDATE generations SET last_used = ? WHERE key = ?", (time.time(), key))
+        if row is None:
+            self.misses += 1
+            if self.mode == "replay":
+                raise CacheMissError(f"No recorded generation for prompt: {prompt[:200]!r}")
+            return None
+        self.hits += 1
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt, llm_string, return_val):
+        if self.mode != "record":
+            return
+        key = self._key(prompt, llm_string)
+        value = json.dumps([dumps(generation) for generation in return_val])
+        size = len(value) + len(llm_string)
+        with self._lock:
+            previous = self._connection.execute("SELECT size FROM generations WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO generations (key, llm_string, value, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, llm_string, value, size, time.time()))
+            self._total_bytes += size - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """
+        Drop the least recently used entries until the cache is back to 90%
+        of its budget.
+        """
+        target = self.max_bytes * 0.9
+        rows = self._connection.execute("SELECT key, size FROM generations ORDER BY last_used").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._connection.executemany("DELETE FROM generations WHERE key = ?", evicted)
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._connection.execute("DELETE FROM generations")
+            self._total_bytes = 0
+
+
+def configure_llm_cache(mode=LLM_CACHE_MODE, path=LLM_CACHE_PATH):
+    """
+    Install the cache for every LangChain LLM in the process.
+
+    Args:
+        mode (str): One of record, replay or passthrough
+        path (str): Location of the SQLite database
+
+    Returns:
+        RecordReplayCache or None when caching is disabled
+    """
+    if mode not in MODES:
+        raise ValueError(f"LLM_CACHE_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+    cache = None if mode == "passthrough" else RecordReplayCache(path, mode=mode)
+    set_llm_cache(cache)
+    return cache
@@ -0,0 +1,115 @@
+import threading
+from collections.abc import Sequence
+
+from langchain_core.messages import BaseMessage
+
+# Guards the growth of shared message lists
+_extend_lock = threading.Lock()
+
+
+class MessageLog(Sequence):
+    """
+    An append-only, immutable view of a conversation's messages.
+
+    Extending a log returns a new, longer view that shares its storage with
+    the old one, so appending k messages costs O(k) however long the
+    conversation is. Earlier views, such as those held by checkpoints, keep
+    seeing exactly the messages they had.
+    """
+
+    __slots__ = ("_items", "_length")
+
+    def __init__(self, messages=()):
+        self._items = list(messages)
+        self._length = len(self._items)
+
+    @classmethod
+    def _view(cls, items: list, length: int) -> "MessageLog":
+        log = cls.__new__(cls)
+        log._items = items
+        log._length = length
+        return log
+
+    def extend(self, messages) -> "MessageLog":
+        """
+        Return a new log with messages appended.
+
+        Args:
+            messages: Messages to append
+
+        Returns:
+            MessageLog: A view of this log's messages followed by the new ones
+        """
+        messages = list(messages)
+        end = self._length + len(messages)
+        with _extend_lock:
+            items = self._items
+            if self._length == len(items):
+                items.extend(messages)
+            elif len(items) >= end and all(a is b for a, b in zip(items[self._length:end], messages)):
+                # The same update applied again to this view, as LangGraph does
+                # when a conditional edge reads the fresh state
+                pass
+            else:
+                # This view is not the newest one; branch off with a copy
+                items = items[:self._length] + messages
+            return self._view(items, end)
+
+    @property
+    def storage(self) -> list:
+        """The list backing this view; views extended from one another share it."""
+        return self._items
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._items[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("MessageLog index out of range")
+        return self._items[index]
+
+    def __iter__(self):
+        items = self._items
+        for i in range(self._length):
+            yield items[i]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (MessageLog, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r})"
+
+    def _asdict(self) -> dict:
+        # LangGraph's serializer stores objects with _asdict like named tuples,
+        # so other checkpointers can save a log as MessageLog(messages=[...])
+        return {"messages": list(self)}
+
+    def __reduce__(self):
+        return (MessageLog, (list(self),))
+
+
+def append_messages(left, right) -> MessageLog:
+    """
+    Reducer for the messages channel: append a node's new messages.
+
+    Unlike `langgraph.graph.add_messages`, which copies and re-indexes the
+    whole list on every update, this never touches the earlier messages.
+
+    Args:
+        left: Current messages of the conversation
+        right: A message or a list of messages emitted by a node
+
+    Returns:
+        MessageLog: The conversation with the new messages appended
+    """
+    if not isinstance(left, MessageLog):
+        left = MessageLog(left or ())
+    if isinstance(right, BaseMessage):
+        right = [right]
+    return left.extend(right or ())
@@ -0,0 +1,345 @@
+"""Durable checkpoints of the conversation graph in a local SQLite database.
+
+Every completed node writes a checkpoint keyed by the conversation's thread
+ID, so a crashed or restarted conversation resumes from its last completed
+node with `app.invoke(None, {"configurable": {"thread_id": ...}})`.
+
+Checkpoints are deltas: only the channels a step changed are written, and
+for the append-only messages channel only the messages added since the last
+checkpoint. Older checkpoints of each thread are pruned, and the least
+recently updated threads can be dropped, to bound the size of the database.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from langgraph.checkpoint.base import WRITES_IDX_MAP, BaseCheckpointSaver, CheckpointTuple, get_checkpoint_id
+
+from message_log import MessageLog
+
+CHECKPOINT_PATH = os.environ.get(
+    "CHECKPOINT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "checkpoints.sqlite3"))
+# Checkpoints kept per thread; older ones are pruned
+CHECKPOINT_KEEP = int(os.environ.get("CHECKPOINT_KEEP", "10"))
+# Threads kept in the database, least recently updated dropped first; 0 keeps all
+CHECKPOINT_MAX_THREADS = int(os.environ.get("CHECKPOINT_MAX_THREADS", "0"))
+# Checkpoints written by a thread between two pruning passes
+PRUNE_EVERY = 20
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        checkpoint_id TEXT NOT NULL,
+        parent_id TEXT,
+        type TEXT NOT NULL,
+        checkpoint BLOB NOT NULL,
+        metadata_type TEXT NOT NULL,
+        metadata BLOB NOT NULL,
+        created REAL NOT NULL,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));
+    CREATE TABLE IF NOT EXISTS blobs (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        channel TEXT NOT NULL,
+        version TEXT NOT NULL,
+        type TEXT NOT NULL,
+        value BLOB,
+        log_id TEXT,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version));
+    CREATE TABLE IF NOT EXISTS messages (
+        thread_id TEXT NOT NULL,
+        log_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        value BLOB NOT NULL,
+        PRIMARY KEY (log_id, seq));
+    CREATE TABLE IF NOT EXISTS writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT NOT NULL,
+        value BLOB NOT NULL,
+        task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));
+    CREATE INDEX IF NOT EXISTS messages_thread ON messages (thread_id);
+"""
+
+
+class SQLiteDeltaSaver(BaseCheckpointSaver):
+    """
+    A LangGraph checkpointer that stores state deltas in SQLite.
+
+    `MessageLog` channels are stored as rows of an append-only messages table
+    and each checkpoint only records how many of them it contains, so the
+    cost of a checkpoint does not grow with the conversation.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH, keep=CHECKPOINT_KEEP, max_threads=CHECKPOINT_MAX_THREADS, serde=None):
+        super().__init__(serde=serde)
+        self.keep = keep
+        self.max_threads = max_threads
+        self._lock = threading.Lock()
+        # (thread, namespace, channel) -> (storage of the saved log, log id, saved length)
+        self._logs = {}
+        self._puts = defaultdict(int)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        # WAL with synchronous=NORMAL survives process crashes without an fsync per step
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    # Writing
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        values = checkpoint["channel_values"]
+        saved = {k: v for k, v in checkpoint.items() if k != "channel_values"}
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                for channel, version in new_versions.items():
+                    self._put_blob(thread_id, checkpoint_ns, channel, str(version), values.get(channel))
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     *self.serde.dumps_typed(saved), *self.serde.dumps_typed(metadata), time.time()))
+                # Prune on the first checkpoint of a thread in this process, then periodically
+                self._puts[thread_id] += 1
+                if (self._puts[thread_id] - 1) % PRUNE_EVERY == 0:
+                    self._prune(thread_id, checkpoint_ns)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                # The in-memory log positions may describe rows that were rolled back
+                self._logs = {key: log for key, log in self._logs.items() if key[0] != thread_id}
+                raise
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def _put_blob(self, thread_id, checkpoint_ns, channel, version, value):
+        if value is None:
+            row = ("empty", None, None)
+        elif isinstance(value, MessageLog):
+            log_id, length = self._append_log(thread_id, checkpoint_ns, channel, value)
+            row = ("log", length, log_id)
+        else:
+            row = (*self.serde.dumps_typed(value), None)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (thread_id, checkpoint_ns, channel, version, *row))
+
+    def _append_log(self, thread_id, checkpoint_ns, channel, log):
+        """Store the messages added to a log since it was last saved."""
+        key = (thread_id, checkpoint_ns, channel)
+        known = self._logs.get(key)
+        if known is not None and known[0] is log.storage and len(log) >= known[2]:
+            _, log_id, start = known
+        else:
+            # A new conversation, or a branch from an earlier checkpoint
+            log_id, start = uuid.uuid4().hex, 0
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)",
+            [(thread_id, log_id, seq, *self.serde.dumps_typed(message))
+             for seq, message in enumerate(log[start:], start)])
+        self._logs[key] = (log.storage, log_id, len(log))
+        return log_id, len(log)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            rows.append((idx >= 0, (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel,
+                                    *self.serde.dumps_typed(value), task_path)))
+        with self._lock:
+            for keep_existing, row in rows:
+                # Regular writes are idempotent, special ones (errors, interrupts) are replaced
+                self._connection.execute(
+                    f"INSERT OR {'IGNORE' if keep_existing else 'REPLACE'} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row)
+
+    # Reading
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        args = [thread_id, checkpoint_ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            args.append(checkpoint_id)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._connection.execute(query, args).fetchone()
+            return self._load(row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        query, args = "SELECT * FROM checkpoints WHERE 1 = 1", []
+        if config:
+            query += " AND thread_id = ?"
+            args.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query += " AND checkpoint_ns = ?"
+                args.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                args.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            query += " AND checkpoint_id < ?"
+            args.append(get_checkpoint_id(before))
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self._connection.execute(query, args).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[6], row[7]))
+            if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._load(row)
+            yield item
+
+    def _load(self, row):
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, data, metadata_type, metadata, _ = row
+        checkpoint = self.serde.loads_typed((type_, data))
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = self._connection.execute(
+                "SELECT type, value, log_id FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))).fetchone()
+            if blob is None or blob[0] == "empty":
+                continue
+            if blob[0] == "log":
+                channel_values[channel] = self._load_log(thread_id, checkpoint_ns, channel, blob[2], blob[1])
+            else:
+                channel_values[channel] = self.serde.loads_typed((blob[0], blob[1]))
+        writes = self._connection.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+            if parent_id else None,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, channel, type_, value in writes
+            ],
+        )
+
+    def _load_log(self, thread_id, checkpoint_ns, channel, log_id, length):
+        rows = self._connection.execute(
+            "SELECT type, value FROM messages WHERE log_id = ? AND seq < ? ORDER BY seq", (log_id, length)).fetchall()
+        log = MessageLog(self.serde.loads_typed(row) for row in rows)
+        key = (thread_id, checkpoint_ns, channel)
+        tip = self._connection.execute("SELECT MAX(seq) + 1 FROM messages WHERE log_id = ?", (log_id,)).fetchone()[0]
+        # Resuming from the newest state of a log keeps appending to it
+        if length == tip:
+            self._logs[key] = (log.storage, log_id, length)
+        return log
+
+    # Pruning
+
+    def _prune(self, thread_id, checkpoint_ns):
+        """Drop all but the newest checkpoints of a thread, and the oldest threads."""
+        stale = [row[0] for row in self._connection.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?", (thread_id, checkpoint_ns, self.keep))]
+        if stale:
+            self._connection.executemany(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in stale])
+            self._connection.executemany(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in stale])
+            self._delete_unreferenced(thread_id, checkpoint_ns)
+        if self.max_threads:
+            for (old_thread,) in self._connection.execute(
+                    "SELECT thread_id FROM checkpoints GROUP BY thread_id "
+                    "ORDER BY MAX(created) DESC LIMIT -1 OFFSET ?", (self.max_threads,)).fetchall():
+                self._delete_thread(old_thread)
+
+    def _delete_unreferenced(self, thread_id, checkpoint_ns):
+        """Delete the channel values and message logs no remaining checkpoint uses."""
+        referenced = set()
+        for type_, data in self._connection.execute(
+                "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns)):
+            referenced.update(
+                (channel, str(version))
+                for channel, version in self.serde.loads_typed((type_, data))["channel_versions"].items())
+        blobs = self._connection.execute(
+            "SELECT channel, version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns)).fetchall()
+        self._connection.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            [(thread_id, checkpoint_ns, channel, version)
+             for channel, version in blobs if (channel, version) not in referenced])
+        self._connection.execute(
+            "DELETE FROM messages WHERE thread_id = ? AND log_id NOT IN "
+            "(SELECT log_id FROM blobs WHERE thread_id = ? AND log_id IS NOT NULL)", (thread_id, thread_id))
+
+    def _delete_thread(self, thread_id):
+        for table in ("checkpoints", "blobs", "messages", "writes"):
+            self._connection.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+        self._logs = {key: log for key, log in self._logs.items() if key[0] != thread_id}
+        self._puts.pop(thread_id, None)
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self._connection.execute("BEGIN")
+            self._delete_thread(thread_id)
+            self._connection.execute("COMMIT")
+
+    def size(self):
+        """Size of the database in bytes, including pages freed by pruning."""
+        with self._lock:
+            page_count = self._connection.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._connection.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    # The database is local and every call takes well under a millisecond,
+    # so the async API runs the same code on the event loop
+
+    async def aget_tuple(self, config):
+        return self.get_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return self.put_writes(config, writes, task_id, task_path)
@@ -5,10 +5,14 @@ from langchain.agents import AgentType, initialize_agent
 from langchain.memory import ConversationBufferMemory
 from langchain.chat_models import ChatOpenAI
 from tools import get_tools
+from python_workers import worker_pool
+from retrieval import drop_index, get_index
+from tool_router import ToolRouter, openai_tool_schemas
 import tempfile
 import json
-import datetime
+import hashlib
 import time
+import uuid
 from openai import OpenAI
 import os
 
@@ -27,9 +31,16 @@ class MultiModalBot:
         # Initialize memory
         self.memory = []
         
+        # Each bot owns a warm Python worker that holds its uploaded files
+        self.session_id = uuid.uuid4().hex
+        self.tools = get_tools(self.session_id)
+        
+        # Route each turn to the tools it needs instead of sending every schema
+        self.router = ToolRouter(self.tools)
+        
         # Initialize agent with all tools
         self.agent = initialize_agent(
-            get_tools(),
+            self.tools,
             self.llm,
             agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
             memory=ConversationBufferMemory(
@@ -48,7 +59,30 @@ class MultiModalBot:
     
     def set_file_paths(self, file_type, path):
         """Set the path for a specific file type"""
+        # Streamlit reruns the script on every turn; an upload that is already
+        # loaded keeps its path (see save_uploaded_file) and is not reloaded
+        previous = self.current_files.get(file_type)
+        if previous == path:
+            return
         self.current_files[file_type] = path
+        
+        # A new file replaces the previous one of its type in the index too
+        if previous:
+            get_index(self.session_id).remove(previous)
+        
+        # Preload data files into the session worker so analysis code runs in memory,
+        # and index them so questions can be answered from the relevant rows only
+        if file_type == 'csv':
+            worker_pool.get(self.session_id).load_file(file_type, path)
+            get_index(self.session_id).add_csv(path)
+        elif file_type == 'json':
+            worker_pool.get(self.session_id).load_file(file_type, path)
+            get_index(self.session_id).add_json(path)
+    
+    def close(self):
+        """Stop the session's Python worker and drop its retrieval index."""
+        worker_pool.release(self.session_id)
+        drop_index(self.session_id)
     
     def process_image(self, image, prompt="Describe this image:"):
         # Save image temporarily for OCR if needed
@@ -91,7 +125,7 @@ class MultiModalBot:
             self.memory.append({"role": "user", "content": message})
 
             # Get the tools
-            tools = get_tools()
+            tools = self.tools
 
             # If there's an image, process it with OCR
             if image:
@@ -111,9 +145,13 @@ class MultiModalBot:
                 if ocr_tool:
                     ocr_result = ocr_tool._run(temp_image_path)
                     if ocr_result and not ocr_result.startswith("Error"):
+                        # Index the OCR text rather than pasting all of it into every prompt
+                        get_index(self.session_id).add_text(temp_image_path, ocr_result)
+                        preview = ocr_result[:300] + "..." if len(ocr_result) > 300 else ocr_result
                         self.memory.append({
                             "role": "system",
-                            "content": f"Text extracted from image: {ocr_result}"
+                            "content": f"Text extracted from image (preview): {preview}\n"
+                                       f"The full text is indexed; use search_uploaded_content to look up details."
                         })
 
             # Prepare messages for the chat
@@ -134,29 +172,19 @@ class MultiModalBot:
             # Add memory contents
             messages.extend(self.memory[-10:])  # Keep last 10 messages for context
 
+            # Only send the schemas of tools relevant to this turn
+            request = {}
+            selected_tools = self.router.select(message, self.current_files)
+            if selected_tools:
+                request["tools"] = openai_tool_schemas(selected_tools)
+
             # Get response from OpenAI
             response = self.client.chat.completions.create(
                 model="gpt-4",
                 messages=messages,
                 temperature=0.7,
                 max_tokens=1500,
-                tools=[{
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "input": {
-                                    "type": "string",
-                                    "description": "The input for the tool"
-                                }
-                            },
-                            "required": ["input"]
-                        }
-                    }
-                } for tool in tools]
+                **request
             )
 
             # Process the response
@@ -171,9 +199,12 @@ class MultiModalBot:
                         args = json.loads(tool_call.function.arguments)
                         tool_outputs.append(tool._run(args.get('input', '')))
 
+                self.router.record_usage(tool_call.function.name for tool_call in assistant_message.tool_calls)
+
                 # Combine tool outputs into a response
                 final_response = "\n".join(tool_outputs) if tool_outputs else "I couldn't process that request."
             else:
+                self.router.record_usage([])
                 final_response = assistant_message.content
 
             # Add response to memory
@@ -190,14 +221,17 @@ def save_uploaded_file(uploaded_file, file_type):
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
     os.makedirs(data_dir, exist_ok=True)
     
-    # Generate unique filename
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{file_type}_{timestamp}_{uploaded_file.name}"
+    # Name the file after its content, so that the same upload maps to the
+    # same path on every Streamlit rerun
+    content = uploaded_file.getvalue()
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    filename = f"{file_type}_{digest}_{uploaded_file.name}"
     file_path = os.path.join(data_dir, filename)
     
     # Save the file
-    with open(file_path, 'wb') as f:
-        f.write(uploaded_file.getvalue())
+    if not os.path.exists(file_path):
+        with open(file_path, 'wb') as f:
+            f.write(content)
     
     return file_path
 
@@ -247,6 +281,9 @@ def main():
         openai_key != st.session_state.get('last_openai_key', '') or
         serpapi_key != st.session_state.get('last_serpapi_key', '')):
         try:
+            # The replaced bot's worker and index would otherwise live until exit
+            if 'bot' in st.session_state:
+                st.session_state.bot.close()
             st.session_state.bot = MultiModalBot()
             st.session_state.last_openai_key = openai_key
             st.session_state.last_serpapi_key = serpapi_key
@@ -0,0 +1,68 @@
+"""Compare prompt tokens and latency of sending every tool versus routed tools.
+
+Run from the multimodal_bot directory:
+
+    python -m benchmarks.bench_tool_routing
+"""
+import statistics
+import time
+
+from openai import OpenAI
+
+from benchmarks.openai_standin import OpenAIStandIn
+from tool_router import ToolRouter, openai_tool_schemas
+from tools import get_tools
+
+CONVERSATION = [
+    "Hi!",
+    "What columns are in my CSV?",
+    "What's the average price per city in the data?",
+    "And the median?",
+    "Thanks!",
+    "What's the weather in London today?",
+    "Get me the latest stock price for $AAPL",
+    "Summarize https://example.com/article",
+    "Find recent papers about retrieval augmented generation",
+    "Who was Ada Lovelace?",
+]
+CURRENT_FILES = {"image": None, "csv": "data/csv_sales.csv", "json": None}
+SYSTEM_PROMPT = {"role": "system", "content": "You are a helpful assistant that can process various types of files."}
+
+
+def run(client, tools, router=None):
+    prompt_tokens, latencies = [], []
+    for message in CONVERSATION:
+        request = {}
+        selected = router.select(message, CURRENT_FILES) if router else tools
+        if selected:
+            request["tools"] = openai_tool_schemas(selected)
+        start = time.perf_counter()
+        response = client.chat.completions.create(
+            model="gpt-4",
+            messages=[SYSTEM_PROMPT, {"role": "user", "content": message}],
+            **request
+        )
+        latencies.append(time.perf_counter() - start)
+        prompt_tokens.append(response.usage.prompt_tokens)
+        if router:
+            tool_calls = response.choices[0].message.tool_calls or []
+            router.record_usage(tool_call.function.name for tool_call in tool_calls)
+    return prompt_tokens, latencies
+
+
+def main():
+    tools = get_tools("benchmark")
+    with OpenAIStandIn() as standin:
+        client = OpenAI(base_url=standin.base_url, api_key="standin")
+        all_tokens, all_latency = run(client, tools)
+        routed_tokens, routed_latency = run(client, tools, ToolRouter(tools))
+
+    print(f"{'':<10}{'prompt tokens/turn':>20}{'mean latency (ms)':>20}")
+    print(f"{'all tools':<10}{statistics.mean(all_tokens):>20.0f}{statistics.mean(all_latency) * 1000:>20.1f}")
+    print(f"{'routed':<10}{statistics.mean(routed_tokens):>20.0f}{statistics.mean(routed_latency) * 1000:>20.1f}")
+    saved = 1 - sum(routed_tokens) / sum(all_tokens)
+    print(f"\nPrompt tokens saved: {saved:.0%} over {len(CONVERSATION)} turns")
+
+
+if __name__ == "__main__":
+    main()
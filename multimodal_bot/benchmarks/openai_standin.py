@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def estimate_tokens(payload):
+    """Rough token count of a request body (about four characters per token)."""
+    return max(1, len(json.dumps(payload)) // 4)
+
+
+class OpenAIStandIn:
+    """A local server that answers /v1/chat/completions like the OpenAI API.
+
+    Latency grows with the prompt size to mimic prefill, so that smaller
+    requests are measurably faster:
+
+        latency = base_latency + prompt_tokens * per_token_latency
+    """
+
+    def __init__(self, base_latency=0.05, per_token_latency=0.00005, host="127.0.0.1", port=0):
+        standin = self
+        self.base_latency = base_latency
+        self.per_token_latency = per_token_latency
+        self.requests = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt_tokens = estimate_tokens({"messages": body.get("messages"), "tools": body.get("tools")})
+                standin.requests.append({"prompt_tokens": prompt_tokens, "tools": len(body.get("tools") or [])})
+                time.sleep(standin.base_latency + prompt_tokens * standin.per_token_latency)
+                response = json.dumps({
+                    "id": "chatcmpl-standin",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "OK"},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 1, "total_tokens": prompt_tokens + 1},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
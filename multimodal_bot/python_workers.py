@@ -0,0 +1,302 @@
+import ast
+import atexit
+import io
+import json
+import multiprocessing as mp
+import os
+import signal
+import tempfile
+import threading
+import traceback
+from collections import OrderedDict
+from contextlib import redirect_stderr, redirect_stdout
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits; executions are only bounded by wall time
+    resource = None
+
+# Default limits applied to every snippet executed in a session worker
+CPU_SECONDS = int(os.getenv("PYTHON_WORKER_CPU_SECONDS", "10"))
+MEMORY_MB = int(os.getenv("PYTHON_WORKER_MEMORY_MB", "2048"))
+WALL_SECONDS = float(os.getenv("PYTHON_WORKER_WALL_SECONDS", "30"))
+MAX_SESSIONS = int(os.getenv("PYTHON_WORKER_MAX_SESSIONS", "8"))
+MAX_OUTPUT_CHARS = 10000
+
+
+class CPULimitExceeded(Exception):
+    pass
+
+
+def _raise_cpu_limit(signum, frame):
+    raise CPULimitExceeded("CPU time limit exceeded")
+
+
+def _load_into(namespace, file_type, path):
+    """Load an uploaded file into the worker namespace and describe what was bound."""
+    pd = namespace["pd"]
+    if file_type == "csv":
+        df = pd.read_csv(path)
+        namespace["df"] = df
+        namespace["files"][path] = df
+        return f"`df` <- {os.path.basename(path)} ({df.shape[0]} rows x {df.shape[1]} columns)"
+
+    with open(path, "r") as f:
+        data = json.load(f)
+    namespace["data"] = data
+    namespace["files"][path] = data
+    bound = f"`data` <- {os.path.basename(path)} ({type(data).__name__})"
+    # Lists of records are far more useful as a DataFrame
+    if isinstance(data, list) and data and all(isinstance(item, dict) for item in data):
+        namespace["json_df"] = pd.json_normalize(data)
+        bound += f", `json_df` ({len(namespace['json_df'])} rows)"
+    return bound
+
+
+def _execute(namespace, code, cpu_seconds):
+    """Run a snippet REPL-style and return its captured output."""
+    output = io.StringIO()
+    limit_set = False
+    try:
+        if resource is not None and cpu_seconds:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            used = int(usage.ru_utime + usage.ru_stime)
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_seconds, hard))
+            limit_set = True
+
+        tree = ast.parse(code, mode="exec")
+        # Echo the value of a trailing expression, like an interactive shell
+        last_expr = None
+        if tree.body and isinstance(tree.body[-1], ast.Expr):
+            last_expr = ast.Expression(tree.body.pop().value)
+
+        with redirect_stdout(output), redirect_stderr(output):
+            exec(compile(tree, "<session>", "exec"), namespace)
+            if last_expr is not None:
+                value = eval(compile(last_expr, "<session>", "eval"), namespace)
+                if value is not None:
+                    print(repr(value))
+    except CPULimitExceeded:
+        output.write(f"Error: execution exceeded the CPU limit of {cpu_seconds}s")
+    except MemoryError:
+        output.write("Error: execution exceeded the memory limit")
+    except Exception:
+        output.write(traceback.format_exc(limit=-3))
+    finally:
+        if limit_set:
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            resource.setrlimit(resource.RLIMIT_CPU, (resource.RLIM_INFINITY, hard))
+
+    text = output.getvalue()
+    if len(text) > MAX_OUTPUT_CHARS:
+        text = text[:MAX_OUTPUT_CHARS] + f"\n... (truncated {len(text) - MAX_OUTPUT_CHARS} characters)"
+    return text or "(no output)"
+
+
+def _worker_main(conn, workdir, memory_mb):
+    """Entry point of a session worker process."""
+    # The heavy imports are paid once, before the worker is handed to a session
+    import numpy as np
+    import pandas as pd
+
+    os.chdir(workdir)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+        if memory_mb:
+            limit = memory_mb * 1024 * 1024
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            if hard == resource.RLIM_INFINITY or limit < hard:
+                resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+    namespace = {"__name__": "__session__", "pd": pd, "np": np, "files": {}}
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            op, payload = conn.recv()
+        except EOFError:
+            break
+        if op == "shutdown":
+            break
+        try:
+            if op == "load":
+                conn.send(("ok", _load_into(namespace, *payload)))
+            elif op == "exec":
+                conn.send(("ok", _execute(namespace, *payload)))
+            else:
+                conn.send(("error", f"Unknown operation {op}"))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class PythonWorker:
+    """A warm, resource-limited Python process that keeps session data in memory."""
+
+    _context = mp.get_context("spawn")
+
+    def __init__(self, cpu_seconds=CPU_SECONDS, memory_mb=MEMORY_MB, wall_seconds=WALL_SECONDS):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_seconds = wall_seconds
+        self.loaded_files = OrderedDict()
+        self._lock = threading.Lock()
+        self._workdir = tempfile.mkdtemp(prefix="session_worker_")
+        self._start()
+
+    def _start(self):
+        self._conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self._workdir, self.memory_mb),
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._ready = False
+
+    def _wait_ready(self):
+        if not self._ready:
+            # Imports can take a few seconds on a cold interpreter
+            if not self._conn.poll(max(self.wall_seconds, 60)):
+                raise RuntimeError("Python worker failed to start")
+            self._conn.recv()
+            self._ready = True
+
+    def _reload(self):
+        """Load the session's files into a fresh process; False if one of them did not load."""
+        for file_type, path in list(self.loaded_files.items()):
+            try:
+                self._request("load", (file_type, path))
+            except (TimeoutError, EOFError, OSError):
+                # Leave the file out instead of failing every restart on it
+                del self.loaded_files[file_type]
+                return False
+        return True
+
+    def _restart(self):
+        while True:
+            self._process.kill()
+            self._process.join()
+            self._start()
+            # Bring the fresh process back to the state the session expects
+            self._wait_ready()
+            if self._reload():
+                return
+
+    def restore(self, loaded_files):
+        """Take over the files of a session whose previous worker was evicted, and load them."""
+        with self._lock:
+            self.loaded_files = loaded_files
+            if loaded_files:
+                self._wait_ready()
+                if not self._reload():
+                    self._restart()
+
+    def _request(self, op, payload):
+        self._conn.send((op, payload))
+        if not self._conn.poll(self.wall_seconds):
+            raise TimeoutError
+        status, result = self._conn.recv()
+        if status == "error":
+            return f"Error: {result}"
+        return result
+
+    def load_file(self, file_type, path):
+        """Load a CSV or JSON file so that snippets can use it without touching the disk."""
+        with self._lock:
+            self._wait_ready()
+            self.loaded_files[file_type] = path
+            try:
+                return self._request("load", (file_type, path))
+            except (TimeoutError, EOFError, OSError):
+                # Restart without the file that failed, or it would fail the restart too
+                del self.loaded_files[file_type]
+                self._restart()
+                return f"Error: loading {path} did not finish within {self.wall_seconds}s"
+
+    def run(self, code):
+        """Execute a snippet in the warm namespace and return its output."""
+        with self._lock:
+            self._wait_ready()
+            try:
+                return self._request("exec", (code, self.cpu_seconds))
+            except TimeoutError:
+                self._restart()
+                return (f"Error: execution exceeded the wall time limit of {self.wall_seconds}s; "
+                        "the session was restarted with the uploaded files reloaded")
+            except (EOFError, OSError):
+                # The process died, most likely from hitting the memory limit
+                self._restart()
+                return "Error: the Python worker crashed and was restarted with the uploaded files reloaded"
+
+    def close(self):
+        try:
+            self._conn.send(("shutdown", None))
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout=1)
+        if self._process.is_alive():
+            self._process.kill()
+        self._conn.close()
+
+
+class PythonWorkerPool:
+    """
+    Hands out one warm worker per chat session and keeps a spare one ready.
+
+    At most max_sessions workers are kept alive; the least recently used one
+    is closed beyond that. The files a session loaded outlive its worker, so
+    a session that comes back after being evicted gets them reloaded.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._workers = OrderedDict()
+        self._session_files = {}  # session_id -> {file_type: path}
+        self._spare = None
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Return the worker for a session, starting one if needed."""
+        with self._lock:
+            worker = self._workers.get(session_id)
+            if worker is not None:
+                self._workers.move_to_end(session_id)
+                return worker
+
+            worker = self._spare or PythonWorker()
+            # Start the next worker now so that the next session gets a warm one
+            self._spare = PythonWorker()
+            self._workers[session_id] = worker
+            loaded_files = self._session_files.setdefault(session_id, OrderedDict())
+            while len(self._workers) > self.max_sessions:
+                _, evicted = self._workers.popitem(last=False)
+                evicted.close()
+
+        # The worker shares the pool's record of the session's files; loading
+        # them can take a while, so it happens outside the pool lock
+        worker.restore(loaded_files)
+        return worker
+
+    def release(self, session_id):
+        with self._lock:
+            worker = self._workers.pop(session_id, None)
+            self._session_files.pop(session_id, None)
+        if worker is not None:
+            worker.close()
+
+    def shutdown(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            if self._spare is not None:
+                workers.append(self._spare)
+            self._workers.clear()
+            self._session_files.clear()
+            self._spare = None
+        for worker in workers:
+            worker.close()
+
+
+worker_pool = PythonWorkerPool()
+atexit.register(worker_pool.shutdown)
@@ -0,0 +1,165 @@
+import csv
+import json
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._'-][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+# Chunk sizes are in words for prose and in rows/lines for structured files
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 20
+CSV_ROWS_PER_CHUNK = 20
+JSON_LINES_PER_CHUNK = 40
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def chunk_text(text, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """Split prose into overlapping windows of words."""
+    words = text.split()
+    if not words:
+        return []
+    step = max(size - overlap, 1)
+    return [" ".join(words[i:i + size]) for i in range(0, max(len(words) - overlap, 1), step)]
+
+
+def chunk_csv(path, rows_per_chunk=CSV_ROWS_PER_CHUNK):
+    """Split a CSV file into blocks of rows, repeating the header in each block."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return []
+        chunks, rows = [], []
+        for row in reader:
+            rows.append(", ".join(f"{column}={value}" for column, value in zip(header, row)))
+            if len(rows) == rows_per_chunk:
+                chunks.append("\n".join(rows))
+                rows = []
+        if rows:
+            chunks.append("\n".join(rows))
+    return chunks
+
+
+def _flatten_json(data, prefix=""):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten_json(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            yield from _flatten_json(value, f"{prefix}.{i}" if prefix else str(i))
+    else:
+        yield f"{prefix}: {data}"
+
+
+def chunk_json(path, lines_per_chunk=JSON_LINES_PER_CHUNK):
+    """Flatten a JSON file into dot-notation lines and group them into blocks."""
+    with open(path, "r") as f:
+        lines = list(_flatten_json(json.load(f)))
+    return ["\n".join(lines[i:i + lines_per_chunk]) for i in range(0, len(lines), lines_per_chunk)]
+
+
+class BM25Index:
+    """An incremental in-memory BM25 index over chunks of session content."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)  # term -> {chunk_id: term frequency}
+        self._chunks = {}  # chunk_id -> (source, text, length)
+        self._sources = defaultdict(list)  # source -> [chunk_id]
+        self._total_length = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._chunks)
+
+    @property
+    def sources(self):
+        return list(self._sources)
+
+    def add(self, source, chunks):
+        """Index chunks for a source, replacing anything indexed for it before."""
+        with self._lock:
+            self._remove(source)
+            for text in chunks:
+                terms = Counter(tokenize(text))
+                if not terms:
+                    continue
+                chunk_id = self._next_id
+                self._next_id += 1
+                length = sum(terms.values())
+                self._chunks[chunk_id] = (source, text, length)
+                self._sources[source].append(chunk_id)
+                self._total_length += length
+                for term, frequency in terms.items():
+                    self._postings[term][chunk_id] = frequency
+        return len(self._sources.get(source, []))
+
+    def add_text(self, source, text):
+        return self.add(source, chunk_text(text))
+
+    def add_csv(self, path):
+        return self.add(path, chunk_csv(path))
+
+    def add_json(self, path):
+        return self.add(path, chunk_json(path))
+
+    def remove(self, source):
+        with self._lock:
+            self._remove(source)
+
+    def _remove(self, source):
+        for chunk_id in self._sources.pop(source, []):
+            _, text, length = self._chunks.pop(chunk_id)
+            self._total_length -= length
+            for term in set(tokenize(text)):
+                postings = self._postings[term]
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query, k=5):
+        """Return the top-k (score, source, text) chunks for a query."""
+        with self._lock:
+            n = len(self._chunks)
+            if not n:
+                return []
+            average_length = self._total_length / n
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, frequency in postings.items():
+                    length = self._chunks[chunk_id][2]
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[chunk_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(score, self._chunks[chunk_id][0], self._chunks[chunk_id][1]) for chunk_id, score in top]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(session_id):
+    """Return the retrieval index of a chat session, creating it on first use."""
+    with _indexes_lock:
+        if session_id not in _indexes:
+            _indexes[session_id] = BM25Index()
+        return _indexes[session_id]
+
+
+def drop_index(session_id):
+    with _indexes_lock:
+        _indexes.pop(session_id, None)
@@ -0,0 +1,66 @@
+"""Tests of the per-turn tool routing.
+
+Run from the multimodal_bot directory:
+
+    python -m pytest tests
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from tool_router import TOOL_PATTERNS, ToolRouter
+
+TOOLS = [SimpleNamespace(name=name) for name in TOOL_PATTERNS]
+
+
+def selected_names(message, current_files=None, router=None):
+    router = router or ToolRouter(TOOLS)
+    return {tool.name for tool in router.select(message, current_files)}
+
+
+@pytest.mark.parametrize("message", [
+    "Hi!",
+    "hello",
+    "hi there, how are you?",
+    "Hey, what's up?",
+    "Good morning! How are you doing today?",
+    "Thanks so much!",
+    "bye, have a nice day",
+])
+def test_small_talk_gets_no_tools(message):
+    assert selected_names(message) == set()
+
+
+@pytest.mark.parametrize("message", [
+    "hi, what is the average price in my csv?",
+    "thanks, now plot the revenue",
+])
+def test_greeting_before_a_question_is_not_small_talk(message):
+    assert selected_names(message)
+
+
+@pytest.mark.parametrize("message", ["What is 2+2?", "compute 3 * (4 + 5)", "12 / 4", "what's 10 - 7"])
+def test_arithmetic_goes_to_python(message):
+    assert "Python_REPL" in selected_names(message)
+
+
+def test_dates_are_not_arithmetic():
+    assert "Python_REPL" not in selected_names("Who was president on 2024-05-01?")
+
+
+def test_uploaded_file_tools_are_always_kept():
+    names = selected_names("How many customers are from Berlin?", {"csv": "data/sales.csv", "image": None})
+    assert {"csv_processor", "Python_REPL", "search_uploaded_content"} <= names
+    assert "image_text_extractor" not in names
+
+
+def test_unrecognised_message_gets_every_tool():
+    assert selected_names("Tell me something") == set(TOOL_PATTERNS)
+
+
+def test_recently_called_tools_stay_available():
+    router = ToolRouter(TOOLS, history_turns=1)
+    router.record_usage(["weather_checker"])
+    assert "weather_checker" in selected_names("Who was Ada Lovelace?", router=router)
+    router.record_usage([])
+    assert "weather_checker" not in selected_names("Who was Ada Lovelace?", router=router)
@@ -0,0 +1,95 @@
+import re
+from collections import deque
+
+# Keyword heuristics for each tool, matched against the lower-cased user message
+TOOL_PATTERNS = {
+    "read_file": r"\bread (the |this |a )?file\b|\bopen (the |this |a )?file\b|\.(txt|md|log|py)\b",
+    "Python_REPL": r"\d\s*[+*/^×÷]\s*\(?\d|\d\s+-\s+\d"  # arithmetic like "2+2" or "7 - 3"
+                   r"|\bpython\b|\bcode\b|\bscript\b|\bcompute\b|\bcalculat|\baverage\b|\bmean\b|\bmedian\b|\bsum\b|\btotal\b"
+                   r"|\bcorrelat|\bgroup ?by\b|\bdistribution\b|\bstatistic|\bplot\b|\bchart\b|\bpercent",
+    "csv_processor": r"\bcsv\b|\bcolumns?\b|\brows?\b|\btable\b|\bspreadsheet\b|\brecords?\b",
+    "json_processor": r"\bjson\b|\bkeys?\b|\bfield\b|\bnested\b",
+    "search_uploaded_content": r"\bfile\b|\bupload|\bdocument\b|\bimage\b|\bpicture\b|\bphoto\b|\bpage\b|\bmention"
+                               r"|\bwhere does\b|\bfind\b|\bsays?\b",
+    "arxiv": r"\barxiv\b|\bpapers?\b|\bpreprint|\bresearch\b|\bpublication|\bstud(y|ies)\b",
+    "wikipedia": r"\bwiki|\bwho (is|was|were)\b|\bwhat (is|was|are)\b|\bhistory of\b|\bbiography\b|\bexplain\b",
+    "duckduckgo_search": r"\bsearch\b|\blook up\b|\bgoogle\b|\bonline\b|\blatest\b|\brecent\b|\bnews\b|\bcurrent\b|\btoday\b",
+    "yahoo_finance_news": r"\bnews\b|\bfinanc|\bmarkets?\b|\bearnings\b|\binvest",
+    "stock_price_checker": r"\bstocks?\b|\bshare price\b|\bticker\b|\bnasdaq\b|\bnyse\b|\$[a-z]{1,5}\b",
+    "weather_checker": r"\bweather\b|\btemperature\b|\bforecast\b|\brain(ing)?\b|\bsnow|\bhumid|\bsunny\b",
+    "web_scraper": r"https?://|\bwww\.|\burl\b|\bwebsite\b|\bweb ?page\b|\bscrape",
+    "image_text_extractor": r"\bocr\b|\bimage\b|\bpicture\b|\bphoto\b|\bscreenshot\b|\btext (in|from|on) (the |this )?(image|picture|photo)",
+}
+
+# Tools that only make sense once a file of the given type has been uploaded
+FILE_TOOLS = {
+    "csv": ["csv_processor", "Python_REPL", "search_uploaded_content"],
+    "json": ["json_processor", "Python_REPL", "search_uploaded_content"],
+    "image": ["image_text_extractor", "search_uploaded_content"],
+}
+
+# A greeting or thanks, optionally followed by pleasantries ("hi there, how are you?")
+SMALL_TALK = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|ok(ay)?|cool|great|good (morning|afternoon|evening)|bye|goodbye)\b"
+    r"( there| again| all| everyone| so much| a lot)?[\s!.?,]*"
+    r"(how are you( doing)?( today)?|how's it going|what's up|nice to meet you|have a (nice|good|great) (day|one))?"
+    r"[\s!.?]*$"
+)
+
+
+class ToolRouter:
+    """Picks the tools worth sending to the model for a single turn."""
+
+    def __init__(self, tools, history_turns=2):
+        self.tools = {tool.name: tool for tool in tools}
+        self.patterns = {name: re.compile(pattern) for name, pattern in TOOL_PATTERNS.items()}
+        # Tools used in the last few turns stay available for follow-up questions
+        self.recent = deque(maxlen=history_turns)
+
+    def select(self, message, current_files=None):
+        """Return the subset of tools relevant to a message, in registration order."""
+        text = message.lower()
+        if SMALL_TALK.match(text):
+            return []
+
+        selected = {name for name, pattern in self.patterns.items() if pattern.search(text)}
+
+        # With files uploaded, most questions are about them ("How many customers
+        # are from Berlin?"), so their tools are always kept
+        for file_type, path in (current_files or {}).items():
+            if path:
+                selected.update(FILE_TOOLS.get(file_type, []))
+
+        # Nothing recognised: let the model choose from every tool
+        if not selected:
+            return list(self.tools.values())
+
+        for names in self.recent:
+            selected.update(names)
+
+        return [tool for name, tool in self.tools.items() if name in selected]
+
+    def record_usage(self, tool_names):
+        """Remember which tools the model called this turn."""
+        self.recent.append(set(tool_names))
+
+
+def openai_tool_schemas(tools):
+    """Describe tools in the OpenAI function calling format."""
+    return [{
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "input": {
+                        "type": "string",
+                        "description": "The input for the tool"
+                    }
+                },
+                "required": ["input"]
+            }
+        }
+    } for tool in tools]
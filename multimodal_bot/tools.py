@@ -18,6 +18,8 @@ import python_weather
 import asyncio
 import os
 from pydantic import Field
+from python_workers import worker_pool
+from retrieval import get_index
 
 class StockPriceTool(BaseTool):
     name: str = Field(default="stock_price_checker")
@@ -69,6 +71,7 @@ class WeatherTool(BaseTool):
 class WebScraperTool(BaseTool):
     name: str = Field(default="web_scraper")
     description: str = Field(default="Scrape text content from a webpage. Input should be the URL.")
+    session_id: Optional[str] = None
 
     def _run(self, url: str) -> str:
         try:
@@ -82,6 +85,10 @@ class WebScraperTool(BaseTool):
             lines = (line.strip() for line in text.splitlines())
             chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
             text = ' '.join(chunk for chunk in chunks if chunk)
+            if self.session_id and len(text) > 1000:
+                # Keep the full page searchable instead of losing everything past the preview
+                get_index(self.session_id).add_text(url, text)
+                return text[:1000] + "...\n\n(The full page has been indexed; use search_uploaded_content to find specific details.)"
             return text[:1000] + "..." if len(text) > 1000 else text
         except Exception as e:
             return f"Error scraping webpage: {str(e)}"
@@ -260,18 +267,56 @@ class JSONProcessor(BaseTool):
     def _arun(self, input_str: str):
         raise NotImplementedError("This tool does not support async")
 
-def get_tools():
-    """Initialize and return all available tools."""
+class ContentSearchTool(BaseTool):
+    name: str = Field(default="search_uploaded_content")
+    description: str = Field(default="Search the uploaded CSV and JSON files, the text extracted from uploaded images and previously scraped web pages. Returns the most relevant passages. Input should be a search query. Prefer this over reading whole files.")
+    session_id: str
+    top_k: int = 5
+
+    def _run(self, query: str) -> str:
+        index = get_index(self.session_id)
+        if not len(index):
+            return "No uploaded content has been indexed yet."
+        results = index.search(query, k=self.top_k)
+        if not results:
+            return f"No passages matched '{query}'. Indexed sources: {', '.join(index.sources)}"
+        return "\n\n".join(
+            f"[{i}] {source} (score {score:.2f})\n{text}"
+            for i, (score, source, text) in enumerate(results, 1)
+        )
+
+    def _arun(self, query: str):
+        raise NotImplementedError("This tool does not support async")
+
+class SessionPythonTool(BaseTool):
+    name: str = Field(default="Python_REPL")
+    description: str = Field(default="A warm Python shell for analysing the uploaded files. pandas is available as `pd`, NumPy as `np`, the latest CSV file as the DataFrame `df` and the latest JSON file as `data` (plus the DataFrame `json_df` when it is a list of records). Variables persist between calls. Input should be valid Python code; use print() or end with an expression to see the output.")
+    session_id: str
+
+    def _run(self, code: str) -> str:
+        return worker_pool.get(self.session_id).run(code)
+
+    def _arun(self, code: str):
+        raise NotImplementedError("This tool does not support async")
+
+def get_tools(session_id: Optional[str] = None):
+    """Initialize and return all available tools.
+
+    When a session id is given, Python code runs in that session's warm worker
+    with the uploaded files already loaded instead of a fresh REPL, and the
+    session's uploaded and scraped content can be searched.
+    """
     tools = [
         # File operations
         ReadFileTool(),
         
         # Code execution
-        PythonREPLTool(),
+        SessionPythonTool(session_id=session_id) if session_id else PythonREPLTool(),
         
         # Data processing
         CSVProcessor(),
         JSONProcessor(),
+        *([ContentSearchTool(session_id=session_id)] if session_id else []),
         
         # Research and information
         ArxivQueryRun(),
@@ -282,7 +327,7 @@ def get_tools():
         # Custom tools
         StockPriceTool(),
         WeatherTool(),
-        WebScraperTool(),
+        WebScraperTool(session_id=session_id),
         OCRTool(),
     ]
     return tools